@@ -0,0 +1,244 @@
+"""
+Scan hot-path benchmark: add_indicators, Bandarmology.calculate_flow_proxies,
+ConfluenceStrategy.calculate_score and an end-to-end run_scan over a synthetic
+universe (strategy.backtest.synthetic_frames) at 100, 1,000 and 10,000 symbols.
+
+Every (size, stage) runs in a fresh process, so peak memory (max RSS, universe
+included) belongs to that stage alone. run_scan goes through the offline replay
+(main.enable_replay): no yfinance, news, Gemini, Telegram or Sheets. It is timed
+cold (first scan, indicator state rebuilt) and warm (next minute's rescan).
+
+Timings are host-specific, so the baseline is kept per machine (scan_baseline.json,
+not committed) and recorded on the first run. Each worker also times a fixed
+calibration loop, and stages are compared as multiples of it, so a busier or
+throttled machine does not read as a regression. Every (size, stage) is the median
+over several runs and processes. The run fails (exit 1) if any stage is slower or
+heavier than this machine's baseline.
+
+    python benchmarks/bench_scan.py                    # check against (or record) the baseline
+    python benchmarks/bench_scan.py --sizes 100 1000   # quicker subset
+    python benchmarks/bench_scan.py --update           # re-record the baseline
+"""
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import resource
+import statistics
+import contextlib
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scan_baseline.json")
+
+SIZES = [100, 1000, 10000]
+# Worker stage -> metrics it reports
+STAGES = {
+    "add_indicators": ["add_indicators"],
+    "flow_proxies": ["flow_proxies"],
+    "calculate_score": ["calculate_score"],
+    "run_scan": ["run_scan_cold", "run_scan_warm"],
+}
+MIN_STAGE_SECONDS = 1.0 # Stages are repeated (up to --repeat) until they add up to this
+MIN_RUNS = 3 # ... but always run at least this often, the median needs a few samples
+# Noise floors before a change counts as a regression (matter for the millisecond stages)
+TIME_SLACK_SECONDS = 0.05
+MEMORY_SLACK_MB = 20
+
+def _median_time(fn, repeat):
+    """Median wall time of fn() over MIN_RUNS..`repeat` runs."""
+    times = []
+    while len(times) < max(repeat, 1):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+        if len(times) >= MIN_RUNS and sum(times) >= MIN_STAGE_SECONDS:
+            break
+    return statistics.median(times)
+
+def _calibrate(runs=5):
+    """
+    Median time of a fixed interpreter + numpy workload, the unit stage times are
+    compared in. Measured in the worker itself, under the same load as the stage.
+    """
+    import numpy as np
+    values = np.random.default_rng(0).normal(size=200_000)
+
+    def work():
+        total = 0
+        for i in range(200_000):
+            total += i * i
+        np.sort(values)
+        np.cumsum(values).std()
+
+    return _median_time(work, runs)
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def _indicator_frames(frames):
+    from indicators.panel import build_panel, compute_panel_indicators
+    indicators = compute_panel_indicators(build_panel(frames))
+    return {s: indicators.frame(s) for s in frames}
+
+def worker(stage, n_symbols, n_bars, repeat):
+    """Runs one stage in this process and prints its metrics as JSON."""
+    sys.path.insert(0, ROOT)
+    from strategy.backtest import synthetic_frames
+    frames = synthetic_frames(n_symbols, n_bars)
+    metrics = {}
+    calibration = _calibrate()
+
+    if stage == "add_indicators":
+        from indicators.indicators import add_indicators
+        metrics["add_indicators"] = _median_time(
+            lambda: [add_indicators(df.copy()) for df in frames.values()], repeat)
+
+    elif stage == "flow_proxies":
+        from data.bandarmology import Bandarmology
+        bandarmology = Bandarmology()
+        indicators = _indicator_frames(frames)
+        metrics["flow_proxies"] = _median_time(
+            lambda: [bandarmology.calculate_flow_proxies(df) for df in indicators.values()], repeat)
+
+    elif stage == "calculate_score":
+        from strategy.score_strategy import ConfluenceStrategy
+        strategy = ConfluenceStrategy()
+        strategy.set_offline()
+        indicators = _indicator_frames(frames)
+        metrics["calculate_score"] = _median_time(
+            lambda: [strategy.calculate_score(df, s) for s, df in indicators.items()], repeat)
+
+    elif stage == "run_scan":
+        import main
+        with contextlib.redirect_stdout(io.StringIO()):
+            replay = main.enable_replay(frames)
+            # Mid-session, so today's bar is partly formed as in a live scan
+            replay.clock.sleep(4 * 3600)
+            t0 = time.perf_counter()
+            main.run_scan(live_mode=True)
+            metrics["run_scan_cold"] = time.perf_counter() - t0
+
+            def rescan():
+                replay.clock.sleep(60)
+                main.run_scan(live_mode=True)
+            metrics["run_scan_warm"] = _median_time(rescan, repeat)
+
+    print(json.dumps({"seconds": metrics, "calibration_seconds": calibration, "peak_rss_mb": _peak_rss_mb()}))
+
+def sample(stage, n_symbols, n_bars, repeat):
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--worker", stage,
+         "--sizes", str(n_symbols), "--bars", str(n_bars), "--repeat", str(repeat)],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def measure(sizes, n_bars, repeat, processes):
+    """
+    Runs every (size, stage) in `processes` fresh workers and keeps the medians.
+    "relative" is seconds in units of the worker's calibration loop.
+
+    Returns:
+        dict: size (str) -> metric -> {"seconds", "relative", "symbols_per_second", "peak_rss_mb"}
+    """
+    results = {}
+    for n in sizes:
+        results[str(n)] = {}
+        for stage, metric_names in STAGES.items():
+            outs = [sample(stage, n, n_bars, repeat) for _ in range(processes)]
+            peak = statistics.median(out["peak_rss_mb"] for out in outs)
+            for name in metric_names:
+                seconds = statistics.median(out["seconds"][name] for out in outs)
+                relative = statistics.median(out["seconds"][name] / out["calibration_seconds"] for out in outs)
+                results[str(n)][name] = {
+                    "seconds": round(seconds, 4),
+                    "relative": round(relative, 4),
+                    "symbols_per_second": round(n / seconds, 1) if seconds else None,
+                    "peak_rss_mb": round(peak, 1),
+                }
+                print(f"[BENCH] {n:>6} symbols  {name:<16} {seconds:8.3f}s  {relative:8.2f}x cal  "
+                      f"{n / seconds:10.0f} sym/s  peak {peak:7.1f} MB")
+    return results
+
+def compare(results, baseline, tolerance, mem_tolerance):
+    """
+    Returns the regressions (one line each) of `results` against `baseline`.
+    Time is compared in calibration units, memory in MB.
+    """
+    regressions = []
+    for size, metrics in results.items():
+        for name, current in metrics.items():
+            base = baseline.get(size, {}).get(name)
+            if base is None or "relative" not in base:
+                print(f"[BENCH] {size} symbols {name}: no baseline")
+                continue
+            # Seconds of slack, converted to calibration units at the current speed
+            unit = current["seconds"] / current["relative"] if current["relative"] else 0.0
+            slack = TIME_SLACK_SECONDS / unit if unit else 0.0
+            time_limit = max(base["relative"] * (1 + tolerance), base["relative"] + slack)
+            mem_limit = max(base["peak_rss_mb"] * (1 + mem_tolerance), base["peak_rss_mb"] + MEMORY_SLACK_MB)
+            if current["relative"] > time_limit:
+                regressions.append(f"{size} symbols {name}: {current['relative']:.2f}x cal "
+                                   f"(baseline {base['relative']:.2f}x, limit {time_limit:.2f}x)")
+            if current["peak_rss_mb"] > mem_limit:
+                regressions.append(f"{size} symbols {name}: peak {current['peak_rss_mb']:.1f} MB "
+                                   f"(baseline {base['peak_rss_mb']:.1f} MB, limit {mem_limit:.1f} MB)")
+    return regressions
+
+def _save_baseline(baseline):
+    with open(BASELINE_FILE, 'w') as f:
+        json.dump(baseline, f, indent=2)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="Universe sizes (symbols)")
+    parser.add_argument("--bars", type=int, default=250, help="Daily bars per symbol")
+    parser.add_argument("--repeat", type=int, default=20, help="Max runs per stage and process (median counts)")
+    parser.add_argument("--processes", type=int, default=3, help="Worker processes per stage (median counts)")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="Allowed slowdown vs baseline (0.3 = +30%%)")
+    parser.add_argument("--mem-tolerance", type=float, default=0.2, help="Allowed peak memory growth vs baseline")
+    parser.add_argument("--update", action="store_true", help="Merge the measurements into the baseline")
+    parser.add_argument("--worker", choices=list(STAGES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.sizes[0], args.bars, args.repeat)
+        return
+
+    results = measure(args.sizes, args.bars, args.repeat, max(args.processes, 1))
+
+    baseline = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, 'r') as f:
+            baseline = json.load(f)
+
+    if args.update:
+        baseline.update(results)
+        _save_baseline(baseline)
+        print(f"[BENCH] Baseline updated for {', '.join(results)} symbols")
+        sys.exit(0)
+
+    # First run on this machine (or a new size, or a baseline from before calibration):
+    # record instead of failing
+    missing = [size for size in results
+               if any("relative" not in m for m in baseline.get(size, {None: {}}).values())]
+    if missing:
+        baseline.update({size: results[size] for size in missing})
+        _save_baseline(baseline)
+        print(f"[BENCH] No baseline on this machine for {', '.join(missing)} symbols yet, recorded it.")
+
+    regressions = compare({s: r for s, r in results.items() if s not in missing}, baseline,
+                          args.tolerance, args.mem_tolerance)
+    for line in regressions:
+        print(f"[BENCH] FAIL: regression: {line}")
+    if not regressions:
+        print("[BENCH] All stages within baseline limits -> OK")
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
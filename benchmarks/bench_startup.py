@@ -0,0 +1,80 @@
+"""
+Startup benchmark: time from a fresh interpreter to "ready to scan" (import main).
+
+Each sample runs in a new process, like the hourly cron job. The run fails (exit 1)
+if the median regresses past the stored baseline, or if importing main pulls in
+anything that should stay lazy (secrets, universe fetch, provider SDKs).
+
+    python benchmarks/bench_startup.py            # check against the baseline
+    python benchmarks/bench_startup.py --update   # record a new baseline
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "startup_baseline.json")
+
+# Must not be loaded (or resolved) just by importing main
+LAZY_MODULES = ["google.generativeai", "finnhub", "polygon", "gspread", "data.stock_universe"]
+LAZY_CONFIG = ["STOCK_UNIVERSE", "GENAI_API_KEY", "TELEGRAM_BOT_TOKEN"]
+
+PROBE = """
+import sys, time, json
+t0 = time.perf_counter()
+import main
+elapsed = time.perf_counter() - t0
+import config
+print(json.dumps({
+    "seconds": elapsed,
+    "eager_modules": [m for m in %r if m in sys.modules],
+    "eager_config": [n for n in %r if n in vars(config)],
+}))
+""" % (LAZY_MODULES, LAZY_CONFIG)
+
+def sample():
+    out = subprocess.run([sys.executable, "-c", PROBE], cwd=ROOT, capture_output=True, text=True, check=True)
+    # main may print; the probe result is the last line
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--tolerance", type=float, default=0.3, help="Allowed slowdown vs baseline (0.3 = +30%%)")
+    parser.add_argument("--update", action="store_true", help="Write the measured median as the new baseline")
+    args = parser.parse_args()
+
+    sample() # Warm the OS file cache / .pyc files
+    samples = [sample() for _ in range(args.runs)]
+    median = statistics.median(s["seconds"] for s in samples)
+    print(f"[BENCH] import main: median {median:.3f}s over {args.runs} runs "
+          f"(min {min(s['seconds'] for s in samples):.3f}s)")
+
+    failed = False
+    eager_modules = sorted({m for s in samples for m in s["eager_modules"]})
+    eager_config = sorted({n for s in samples for n in s["eager_config"]})
+    if eager_modules or eager_config:
+        print(f"[BENCH] FAIL: loaded at import time: {', '.join(eager_modules + eager_config)}")
+        failed = True
+
+    if args.update:
+        with open(BASELINE_FILE, 'w') as f:
+            json.dump({"import_main_seconds": round(median, 4)}, f, indent=2)
+        print(f"[BENCH] Baseline updated: {median:.3f}s")
+    elif os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, 'r') as f:
+            baseline = json.load(f)["import_main_seconds"]
+        limit = baseline * (1 + args.tolerance)
+        status = "OK" if median <= limit else "FAIL: regression"
+        print(f"[BENCH] Baseline {baseline:.3f}s, limit {limit:.3f}s -> {status}")
+        failed = failed or median > limit
+    else:
+        print("[BENCH] No baseline yet, run with --update to record one.")
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
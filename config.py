@@ -1,70 +1,163 @@
 # Configuration for ID Swing Trading System
 
-# List of stocks to scan (IDX)
-# Easy to modify/add new stocks here
-from data.stock_universe import fetch_idx_universe
+import json
+import os
 
 # List of stocks to scan (IDX)
-# Dynamically fetched from external source to cover all IPOs/Tickers
-try:
-    STOCK_UNIVERSE = fetch_idx_universe()
-    if not STOCK_UNIVERSE:
-        raise Exception("Empty universe returned")
-except Exception as e:
-    print(f"[CONFIG] Warning: Failed to fetch dynamic universe ({e}). Using fallback list.")
-    STOCK_UNIVERSE = [
-        "UNTR.JK", "ASII.JK", "BBNI.JK", "TLKM.JK", "PGAS.JK", 
-        "INCO.JK", "MDKA.JK", "HUMI.JK", "BRMS.JK", "ADRO.JK", 
-        "ADMR.JK", "NICL.JK", "RAJA.JK", "RATU.JK", "ENRG.JK", 
-        "DSSA.JK", "BBCA.JK", "BBRI.JK", "BMRI.JK", "GOTO.JK",
-        "AMMN.JK", "MEDC.JK", "PTBA.JK", "UNVR.JK", "ICBP.JK"
-    ]
+# Dynamically fetched from external source to cover all IPOs/Tickers.
+# Resolved on first access of config.STOCK_UNIVERSE (see __getattr__ below),
+# so importing config never touches the network.
+FALLBACK_UNIVERSE = [
+    "UNTR.JK", "ASII.JK", "BBNI.JK", "TLKM.JK", "PGAS.JK", 
+    "INCO.JK", "MDKA.JK", "HUMI.JK", "BRMS.JK", "ADRO.JK", 
+    "ADMR.JK", "NICL.JK", "RAJA.JK", "RATU.JK", "ENRG.JK", 
+    "DSSA.JK", "BBCA.JK", "BBRI.JK", "BMRI.JK", "GOTO.JK",
+    "AMMN.JK", "MEDC.JK", "PTBA.JK", "UNVR.JK", "ICBP.JK"
+]
+
+def _load_universe():
+    from data.stock_universe import fetch_idx_universe
+    try:
+        universe = fetch_idx_universe()
+        if not universe:
+            raise Exception("Empty universe returned")
+        return universe
+    except Exception as e:
+        print(f"[CONFIG] Warning: Failed to fetch dynamic universe ({e}). Using fallback list.")
+        return list(FALLBACK_UNIVERSE)
 
 # Timeframe Settings
 TIMEFRAME = "1d"  # Daily
 HISTORY_PERIOD = "1y" # Fetch 1 year of data to ensure enough for MA50 and MA200
+DOWNLOAD_CHUNK_SIZE = 100 # Tickers per yfinance request in bulk fetches
 
-import json
-import os
+# Scan Pipeline Concurrency (max in-flight work per stage)
+STAGE_LIMITS = {
+    "fetch": 4,         # yfinance bulk download chunks
+    "score": 8,         # survivors in the fundamental/sentiment stage
+    "fundamentals": 4,  # yfinance .info calls
+    "news": 24,         # news provider requests
+    "llm": 2,           # Gemini requests
+}
+NEWS_DEADLINE_SECONDS = 8 # Overall budget for the parallel news fan-out per symbol
+
+# Sentiment Cache (Gemini verdict per symbol + headline set)
+SENTIMENT_CACHE_TTL_MINUTES = 720
+SENTIMENT_CACHE_MAX_ENTRIES = 2000
+
+# Fundamentals Store (yfinance .info)
+FUNDAMENTALS_TTL_HOURS = 24
+FUNDAMENTALS_PREFETCH_WORKERS = 2 # Pre-session .info refresh, separate from STAGE_LIMITS["fundamentals"]
+
+# Batched Gemini Requests
+GEMINI_BATCH_TOKEN_LIMIT = 24000 # Estimated prompt tokens per request before splitting
+GEMINI_BATCH_MAX_SYMBOLS = 25
+
+# Telegram Alert Dispatcher
+TELEGRAM_QUEUE_SIZE = 200
+TELEGRAM_MIN_INTERVAL_SECONDS = 3 # Per chat; groups are limited to ~20 messages/min
+TELEGRAM_BURST_WINDOW_SECONDS = 2 # Alerts arriving within this window go out as one message
+TELEGRAM_MAX_RETRIES = 4
+
+# HTTP Sessions (news providers)
+HTTP_POOL_SIZE = 8 # Keep-alive connections per provider
+HTTP_TIMEOUTS = {  # (connect, read) seconds
+    "default": (5, 10),
+    "idx": (5, 15),
+}
+
+# Provider Quotas (free tiers). per_day None = no daily cap.
+PROVIDER_LIMITS = {
+    "idx":       {"per_minute": 60, "per_day": None},
+    "finnhub":   {"per_minute": 60, "per_day": None},
+    "polygon":   {"per_minute": 5,  "per_day": None},
+    "marketaux": {"per_minute": 30, "per_day": 100},
+    "newsapi":   {"per_minute": 30, "per_day": 100},
+    "newsdata":  {"per_minute": 30, "per_day": 200},
+    "gemini":    {"per_minute": 15, "per_day": 1500, "tokens_per_minute": 1_000_000},
+}
+GEMINI_MAX_WAIT_SECONDS = 60 # Longest wait for a Gemini rate-limit slot before skipping
+
+# News Provider Circuit Breakers
+BREAKER_FAILURE_THRESHOLD = 5         # Consecutive errors before a provider is cut off
+BREAKER_COOLDOWN_SECONDS = 300
+SYMBOL_BREAKER_THRESHOLD = 3          # Consecutive errors / empty results for one provider+symbol
+SYMBOL_BREAKER_COOLDOWN_SECONDS = 1800
+NEGATIVE_CACHE_TTL_HOURS = 24         # Known-empty provider+symbol pairs are skipped this long
+
+# Liquidity Index (rebuilt daily from stored bars)
+LIQUIDITY_WINDOW = 20 # Sessions
+LIQUIDITY_TIERS = {   # Most to least liquid; below the last tier is "D"
+    "A": {"min_median_value": 10_000_000_000, "min_days_ratio": 0.9},
+    "B": {"min_median_value": 1_000_000_000, "min_days_ratio": 0.75},
+    "C": {"min_median_value": 100_000_000, "min_days_ratio": 0.5}, # Bandarmology TH_CIRC
+}
+LIQUIDITY_SCAN_TIERS = ["A", "B", "C"]
+
+# Live Scan Scheduler (minutes between rescans per priority tier)
+SCAN_TIER_MINUTES = {
+    "hot": 1,     # Near 65, RSI pullback, volume building
+    "warm": 5,    # Weak tech / bearish but close to MA50 or oversold
+    "cold": 15,   # Bearish, up to 10% below MA50
+    "frozen": 30, # Deep BEARISH_SKIP, no data
+}
+SCAN_HOT_SCORE = 50 # Scores this close to the 65 WATCHLIST line are always hot
+
+# Scan metrics (output/metrics.py), exported after every live scan
+SCAN_BUDGET_SECONDS = 60 # The live loop rescans every minute
+METRICS_JSONL_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "scan_metrics.jsonl")
+# Point this at node_exporter's --collector.textfile.directory to scrape it
+METRICS_TEXTFILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "scan_metrics.prom")
+
+# Load Secrets (lazily, on first access of any name below)
+SECRET_NAMES = [
+    "TELEGRAM_BOT_TOKEN", "TELEGRAM_CHAT_ID",
+    "GENAI_API_KEY", "FINNHUB_API_KEY", "POLYGON_API_KEY",
+    "MARKETAUX_API_KEY", "NEWSAPI_KEY", "NEWSDATA_KEY",
+    "GOOGLE_SHEET_ID", "GOOGLE_SHEET_JSON_KEYFILE", "GOOGLE_SHEET_NAME",
+]
+
+def _load_secrets():
+    secrets = {}
+    try:
+        with open(os.path.join(os.path.dirname(__file__), 'secrets', 'telegram_creds.json'), 'r') as f:
+            creds = json.load(f)
+            secrets['TELEGRAM_BOT_TOKEN'] = creds.get('bot_token')
+            secrets['TELEGRAM_CHAT_ID'] = creds.get('chat_id')
+            
+
+        # Load Gemini Key
+        with open(os.path.join(os.path.dirname(__file__), 'secrets', 'api_keys.json'), 'r') as f:
+            api_creds = json.load(f)
+            secrets['GENAI_API_KEY'] = api_creds.get('api_key')
+            secrets['FINNHUB_API_KEY'] = api_creds.get('finnhub_api_key')
+            secrets['POLYGON_API_KEY'] = api_creds.get('polygon_api_key')
+            secrets['MARKETAUX_API_KEY'] = api_creds.get('marketaux_api_key')
+            secrets['NEWSAPI_KEY'] = api_creds.get('newsapi_key')
+            secrets['NEWSDATA_KEY'] = api_creds.get('newsdata_key')
 
+        # Load Google Sheet Config
+        with open(os.path.join(os.path.dirname(__file__), 'secrets', 'google_config.json'), 'r') as f:
+            g_creds = json.load(f)
+            secrets['GOOGLE_SHEET_ID'] = g_creds.get('sheet_id')
+            secrets['GOOGLE_SHEET_JSON_KEYFILE'] = g_creds.get('json_keyfile')
+            secrets['GOOGLE_SHEET_NAME'] = g_creds.get('sheet_name')
+            
+    except Exception as e:
+        print(f"Error loading secrets: {e}")
+        secrets = {}
+    return {name: secrets.get(name) for name in SECRET_NAMES}
 
-# Load Secrets
-try:
-    with open(os.path.join(os.path.dirname(__file__), 'secrets', 'telegram_creds.json'), 'r') as f:
-        creds = json.load(f)
-        TELEGRAM_BOT_TOKEN = creds.get('bot_token')
-        TELEGRAM_CHAT_ID = creds.get('chat_id')
-        
-
-    # Load Gemini Key
-    with open(os.path.join(os.path.dirname(__file__), 'secrets', 'api_keys.json'), 'r') as f:
-        api_creds = json.load(f)
-        GENAI_API_KEY = api_creds.get('api_key')
-        FINNHUB_API_KEY = api_creds.get('finnhub_api_key')
-        POLYGON_API_KEY = api_creds.get('polygon_api_key')
-        MARKETAUX_API_KEY = api_creds.get('marketaux_api_key')
-        NEWSAPI_KEY = api_creds.get('newsapi_key')
-        NEWSDATA_KEY = api_creds.get('newsdata_key')
-
-    # Load Google Sheet Config
-    with open(os.path.join(os.path.dirname(__file__), 'secrets', 'google_config.json'), 'r') as f:
-        g_creds = json.load(f)
-        GOOGLE_SHEET_ID = g_creds.get('sheet_id')
-        GOOGLE_SHEET_JSON_KEYFILE = g_creds.get('json_keyfile')
-        GOOGLE_SHEET_NAME = g_creds.get('sheet_name')
-        
-except Exception as e:
-    print(f"Error loading secrets: {e}")
-    TELEGRAM_BOT_TOKEN = None
-    TELEGRAM_CHAT_ID = None
-    GENAI_API_KEY = None
-    GOOGLE_SHEET_ID = None
-    GOOGLE_SHEET_JSON_KEYFILE = None
-    FINNHUB_API_KEY = None
-    POLYGON_API_KEY = None
-    MARKETAUX_API_KEY = None
-    NEWSAPI_KEY = None
-    NEWSDATA_KEY = None
+def __getattr__(name):
+    # Module-level lazy attributes (PEP 562): computed once, then stored as plain globals
+    if name == "STOCK_UNIVERSE":
+        globals()[name] = _load_universe()
+        return globals()[name]
+    if name in SECRET_NAMES:
+        for key, value in _load_secrets().items():
+            globals().setdefault(key, value)
+        return globals()[name]
+    raise AttributeError(f"module 'config' has no attribute '{name}'")
 
 # Gemini AI API Key
 # Loaded from secrets now.
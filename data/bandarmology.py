@@ -1,5 +1,10 @@
 
 import random
+import numpy as np
+
+# Flow filter thresholds (IDR)
+TH_ACCUM = 500_000_000
+TH_CIRC = 100_000_000
 
 class Bandarmology:
     def __init__(self):
@@ -62,10 +67,6 @@ class Bandarmology:
         passed = False
         reasons = []
         
-        # Thresholds (IDR)
-        TH_ACCUM = 500_000_000
-        TH_CIRC = 100_000_000
-        
         if accumulation_value > TH_ACCUM:
             if circulation_value > TH_CIRC:
                  # If Accum > 500M, it implies MF > 0 (since 500M is positive)
@@ -84,4 +85,30 @@ class Bandarmology:
             "circulation_value": circulation_value,
             "passed_filters": passed,
             "reasons": reasons
-        } 
+        }
+
+    def calculate_flow_proxies_batch(self, close, high, low, vol):
+        """
+        Vectorized calculate_flow_proxies for arrays of last bars (any shape).
+        
+        Returns:
+           dict: {
+               'accumulation_value': np.ndarray,
+               'circulation_value': np.ndarray,
+               'passed_filters': np.ndarray (bool)
+           }
+        """
+        close, high, low, vol = (np.asarray(x, dtype=float) for x in (close, high, low, vol))
+        circulation_value = vol * close
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mfm = np.where(high == low, 0.0, ((close - low) - (high - close)) / (high - low))
+        accumulation_value = mfm * circulation_value
+        
+        passed = (accumulation_value > TH_ACCUM) & (circulation_value > TH_CIRC)
+        
+        return {
+            "accumulation_value": accumulation_value,
+            "circulation_value": circulation_value,
+            "passed_filters": passed
+        }
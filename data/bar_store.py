@@ -0,0 +1,163 @@
+import os
+import importlib.util
+import pandas as pd
+
+# On-disk OHLCV store so scans only download bars after the last stored one.
+# One file per (symbol, interval). Parquet when pyarrow is installed, pickle otherwise.
+STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bars")
+STORE_FORMAT = "parquet" if importlib.util.find_spec("pyarrow") else "pickle"
+
+# yfinance period strings -> how much history to keep on disk
+PERIOD_OFFSETS = {
+    "d": lambda n: pd.DateOffset(days=n),
+    "wk": lambda n: pd.DateOffset(weeks=n),
+    "mo": lambda n: pd.DateOffset(months=n),
+    "y": lambda n: pd.DateOffset(years=n),
+}
+
+def period_to_offset(period):
+    """
+    Converts a yfinance period string ('5d', '6mo', '1y') into a DateOffset.
+    Returns None for open-ended periods ('max', 'ytd') or unknown strings.
+    """
+    for suffix in ("wk", "mo", "d", "y"):
+        if period.endswith(suffix) and period[:-len(suffix)].isdigit():
+            return PERIOD_OFFSETS[suffix](int(period[:-len(suffix)]))
+    return None
+
+def _trim(df, period):
+    """Drops bars older than `period` before the last one (no-op for open-ended periods)."""
+    offset = period_to_offset(period) if period else None
+    if offset is None:
+        return df
+    return df[df.index > df.index[-1] - offset]
+
+class BarStore:
+    def __init__(self, root=STORE_DIR, fmt=STORE_FORMAT):
+        self.root = root
+        self.fmt = fmt
+
+    def path(self, symbol, interval):
+        ext = "parquet" if self.fmt == "parquet" else "pkl"
+        return os.path.join(self.root, f"{symbol}_{interval}.{ext}")
+
+    def load(self, symbol, interval):
+        """
+        Returns the stored bars for (symbol, interval), or None if nothing is stored.
+        """
+        path = self.path(symbol, interval)
+        if not os.path.exists(path):
+            return None
+        try:
+            if self.fmt == "parquet":
+                df = pd.read_parquet(path)
+            else:
+                df = pd.read_pickle(path)
+        except Exception as e:
+            print(f"[BARS] Corrupt store file for {symbol} ({e}). Refetching.")
+            return None
+        if df.empty:
+            return None
+        return df
+
+    def symbols(self, interval):
+        """Every symbol with stored bars for `interval`, sorted."""
+        suffix = os.path.basename(self.path("", interval))
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name[:-len(suffix)] for name in os.listdir(self.root) if name.endswith(suffix))
+
+    def save(self, symbol, interval, df):
+        os.makedirs(self.root, exist_ok=True)
+        path = self.path(symbol, interval)
+        tmp_path = path + ".tmp"
+        if self.fmt == "parquet":
+            df.to_parquet(tmp_path)
+        else:
+            df.to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+
+    def is_fresh(self, stored, period):
+        """
+        A stored frame can be extended incrementally unless its last bar is older
+        than the requested period (then a full download is cheaper than a gap fill).
+        """
+        if stored is None:
+            return False
+        offset = period_to_offset(period)
+        if offset is None:
+            return True
+        now = pd.Timestamp.now(tz=stored.index.tz)
+        return stored.index[-1] >= now - offset
+
+    def merge(self, symbol, interval, new_bars, period=None, stored=None):
+        """
+        Appends freshly downloaded bars to the stored history and persists the result.
+        Stored bars at or after the first new bar are replaced, which overwrites the
+        still-forming bar for today. History older than `period` is trimmed.
+        Pass `stored=None` to replace the stored history entirely.
+
+        Returns:
+            pd.DataFrame: The merged frame.
+        """
+        if stored is not None and new_bars is not None and not new_bars.empty:
+            merged = pd.concat([stored[stored.index < new_bars.index[0]], new_bars])
+        elif new_bars is not None and not new_bars.empty:
+            merged = new_bars
+        else:
+            return stored
+
+        merged = _trim(merged[~merged.index.duplicated(keep='last')], period)
+
+        try:
+            self.save(symbol, interval, merged)
+        except Exception as e:
+            print(f"[BARS] Failed to persist {symbol}: {e}")
+
+        return merged
+
+    def patch_last_bar(self, symbol, interval, bar, period=None, stored=None):
+        """
+        Writes one live bar into the stored history without touching older rows:
+        replaces the last stored bar if it is the same session, appends it if it
+        is a later one. Bars older than the stored last bar are ignored. History
+        older than `period` is trimmed, as in merge.
+        Appending leaves the previous last bar as stored; callers finalize it first
+        (fetch_latest_bars refetches it through fetch_bulk_data).
+
+        Args:
+            bar (pd.Series): Open, High, Low, Close, Volume; name is the bar timestamp.
+            period (str): History to keep, e.g. '1y'.
+            stored (pd.DataFrame): Stored frame if already loaded.
+
+        Returns:
+            pd.DataFrame: The patched frame (or the stored one if nothing changed).
+        """
+        if stored is None:
+            stored = self.load(symbol, interval)
+        if stored is None:
+            return None
+
+        last_ts = stored.index[-1]
+        ts = pd.Timestamp(bar.name)
+        # Align timezones with the stored index
+        if last_ts.tz is not None:
+            ts = ts.tz_localize(last_ts.tz) if ts.tz is None else ts.tz_convert(last_ts.tz)
+        elif ts.tz is not None:
+            ts = ts.tz_localize(None)
+
+        columns = list(bar.index)
+        if ts.date() == last_ts.date():
+            patched = stored.copy()
+            patched.loc[last_ts, columns] = bar.to_numpy(dtype=float)
+        elif ts.date() > last_ts.date():
+            row = pd.DataFrame([bar.to_numpy(dtype=float)], columns=columns, index=pd.DatetimeIndex([ts], name=stored.index.name))
+            patched = _trim(pd.concat([stored, row]), period)
+        else:
+            return stored
+
+        try:
+            self.save(symbol, interval, patched)
+        except Exception as e:
+            print(f"[BARS] Failed to persist {symbol}: {e}")
+        return patched
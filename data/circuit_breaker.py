@@ -0,0 +1,190 @@
+import os
+import json
+import time
+import threading
+import sys
+
+# Add parent to path for config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+# Circuit breakers for the news providers.
+# A provider-wide breaker cuts off a source after repeated errors (expired key, outage)
+# and a provider+symbol breaker cuts off one ticker the provider keeps failing on.
+# (provider, symbol) pairs that keep coming back empty - e.g. Polygon and most .JK
+# tickers - are negatively cached on disk for a day, as are per-symbol 404s right away.
+NEGATIVE_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "news_negative_cache.json")
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+class SymbolNotFound(Exception):
+    """The provider answered but does not know the symbol (e.g. a Polygon 404)."""
+    pass
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures and rejects calls for `cooldown`
+    seconds. Then one trial call is let through: success closes it, failure re-opens.
+    """
+    def __init__(self, threshold, cooldown):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return CLOSED
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return HALF_OPEN
+        return OPEN
+
+    def allow(self):
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and not self.trial_running:
+            self.trial_running = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.trial_running or self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+        self.trial_running = False
+
+    def seconds_left(self):
+        if self.opened_at is None:
+            return 0
+        return max(0, int(self.cooldown - (time.monotonic() - self.opened_at)))
+
+class NewsBreakers:
+    def __init__(self, path=NEGATIVE_CACHE_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.providers = {}
+        self.pairs = {}
+        self.empty_streak = {}
+        self.negative_ttl = config.NEGATIVE_CACHE_TTL_HOURS * 3600
+        self.known_empty = self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r') as f:
+                entries = json.load(f)
+        except Exception as e:
+            print(f"[BREAKER] Cache read error: {e}")
+            return {}
+        now = time.time()
+        return {k: ts for k, ts in entries.items() if now - ts < self.negative_ttl}
+
+    def _save(self):
+        try:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self.known_empty, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"[BREAKER] Cache write error: {e}")
+
+    def _provider(self, provider):
+        if provider not in self.providers:
+            self.providers[provider] = CircuitBreaker(config.BREAKER_FAILURE_THRESHOLD, config.BREAKER_COOLDOWN_SECONDS)
+        return self.providers[provider]
+
+    def _pair(self, provider, symbol):
+        key = f"{provider}|{symbol}"
+        if key not in self.pairs:
+            self.pairs[key] = CircuitBreaker(config.SYMBOL_BREAKER_THRESHOLD, config.SYMBOL_BREAKER_COOLDOWN_SECONDS)
+        return self.pairs[key]
+
+    def allow(self, provider, symbol):
+        """
+        Whether `provider` should be queried for `symbol` right now.
+        A True answer from a half-open breaker reserves its single trial call.
+        """
+        key = f"{provider}|{symbol}"
+        with self.lock:
+            ts = self.known_empty.get(key)
+            if ts is not None:
+                if time.time() - ts < self.negative_ttl:
+                    return False
+                del self.known_empty[key]
+            # Ask the provider breaker first so a rejected pair doesn't burn its trial
+            if not self._provider(provider).allow():
+                return False
+            if not self._pair(provider, symbol).allow():
+                # Hand back a half-open provider trial we can't use
+                self._provider(provider).trial_running = False
+                return False
+            return True
+
+    def release(self, provider, symbol):
+        """The call allowed by allow() never happened: free any half-open trial it held."""
+        with self.lock:
+            self._provider(provider).trial_running = False
+            self._pair(provider, symbol).trial_running = False
+
+    def record_result(self, provider, symbol, headlines):
+        """Records a completed call; empty results count against the pair only."""
+        key = f"{provider}|{symbol}"
+        with self.lock:
+            self._provider(provider).record_success()
+            self._pair(provider, symbol).record_success()
+            if headlines:
+                self.empty_streak.pop(key, None)
+                return
+            streak = self.empty_streak.get(key, 0) + 1
+            if streak >= config.SYMBOL_BREAKER_THRESHOLD:
+                self.empty_streak.pop(key, None)
+                self.known_empty[key] = time.time()
+                self._save()
+            else:
+                self.empty_streak[key] = streak
+
+    def record_not_found(self, provider, symbol):
+        """
+        Records a per-symbol 404: the provider is healthy, the pair is negatively
+        cached right away so it is not asked again until the entry expires.
+        """
+        key = f"{provider}|{symbol}"
+        with self.lock:
+            self._provider(provider).record_success()
+            self._pair(provider, symbol).record_success()
+            self.empty_streak.pop(key, None)
+            self.known_empty[key] = time.time()
+            self._save()
+
+    def record_failure(self, provider, symbol):
+        with self.lock:
+            self._provider(provider).record_failure()
+            self._pair(provider, symbol).record_failure()
+
+    def summary(self):
+        """
+        Breaker state for the scan log, e.g.
+        'polygon OPEN (240s left) | 2 symbol breakers open | 37 known-empty pairs'.
+        """
+        with self.lock:
+            providers = [
+                f"{name} {breaker.state.upper()} ({breaker.seconds_left()}s left)"
+                for name, breaker in sorted(self.providers.items()) if breaker.state != CLOSED
+            ]
+            open_pairs = sum(1 for b in self.pairs.values() if b.state != CLOSED)
+            known_empty = len(self.known_empty)
+        parts = providers or ["all providers closed"]
+        parts.append(f"{open_pairs} symbol breakers open")
+        parts.append(f"{known_empty} known-empty pairs")
+        return " | ".join(parts)
+
+news_breakers = NewsBreakers()
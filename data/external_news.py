@@ -1,6 +1,4 @@
-import finnhub
-from polygon import RESTClient
-import requests
+from data.http_sessions import get_session
 import os
 import sys
 from datetime import datetime, timedelta
@@ -8,6 +6,7 @@ from datetime import datetime, timedelta
 # Add parent to path for config
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
+from data.circuit_breaker import SymbolNotFound
 
 class FinnhubNewsFetcher:
     def __init__(self):
@@ -15,6 +14,7 @@ class FinnhubNewsFetcher:
         self.client = None
         if self.api_key:
             try:
+                import finnhub # Imported on first use, keeps startup light
                 self.client = finnhub.Client(api_key=self.api_key)
             except Exception as e:
                 print(f"[Finnhub] Error initializing client: {e}")
@@ -46,6 +46,7 @@ class FinnhubNewsFetcher:
                     
         except Exception as e:
             print(f"[Finnhub] Error fetching news for {symbol}: {e}")
+            raise # Let the caller's circuit breaker count it
 
         return headlines
 
@@ -55,6 +56,7 @@ class PolygonNewsFetcher:
         self.client = None
         if self.api_key:
             try:
+                from polygon import RESTClient # Imported on first use, keeps startup light
                 self.client = RESTClient(api_key=self.api_key)
             except Exception as e:
                 print(f"[Polygon] Error initializing client: {e}")
@@ -93,9 +95,12 @@ class PolygonNewsFetcher:
                  headlines.append(full_text)
                  
         except Exception as e:
-            # Polygon might return 404 or empty if not found
-            # print(f"[Polygon] Note: {e}") 
-            pass
+            # A 404 only means Polygon doesn't track this ticker (most .JK names),
+            # it says nothing about Polygon itself
+            if "NOT_FOUND" in str(e) or "404" in str(e):
+                raise SymbolNotFound(f"Polygon has no ticker {symbol}") from e
+            # Re-raise so the circuit breaker can cut off the doomed round-trips.
+            raise
 
         return headlines
 
@@ -116,7 +121,8 @@ class MarketAuxFetcher:
                 'api_token': self.api_key,
                 'language': 'en'
             }
-            response = requests.get(url, params=params, timeout=10)
+            response = get_session("marketaux").get(url, params=params)
+            response.raise_for_status() # Expired key / out of credits is a failure, not "no news"
             if response.status_code == 200:
                 data = response.json()
                 headlines = []
@@ -128,6 +134,7 @@ class MarketAuxFetcher:
                 return headlines
         except Exception as e:
             print(f"[MarketAux] Exception: {e}")
+            raise
         return []
 
 class NewsAPIFetcher:
@@ -148,7 +155,8 @@ class NewsAPIFetcher:
                 'apiKey': self.api_key,
                 'language': 'en' 
             }
-            response = requests.get(url, params=params, timeout=10)
+            response = get_session("newsapi").get(url, params=params)
+            response.raise_for_status()
              
             if response.status_code == 200:
                 data = response.json()
@@ -161,6 +169,7 @@ class NewsAPIFetcher:
                 return headlines
         except Exception as e:
             print(f"[NewsAPI] Exception: {e}")
+            raise
         return []
 
 class NewsDataFetcher:
@@ -178,7 +187,8 @@ class NewsDataFetcher:
                 'q': symbol,
                 'language': 'en,id' 
             }
-            response = requests.get(url, params=params, timeout=10)
+            response = get_session("newsdata").get(url, params=params)
+            response.raise_for_status()
             if response.status_code == 200:
                 data = response.json()
                 headlines = []
@@ -194,4 +204,5 @@ class NewsDataFetcher:
                 return headlines
         except Exception as e:
              print(f"[NewsData] Exception: {e}")
+             raise
         return []
@@ -0,0 +1,126 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+import os
+import sys
+
+# Add parent to path for config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+# Shared HTTP transport for the news providers.
+# Each provider gets one long-lived session with a keep-alive connection pool, so only
+# the first request per connection pays the TCP+TLS handshake. Sessions are created
+# on first use and shared by all scan threads.
+
+_sessions = {}
+_lock = threading.Lock()
+
+def provider_timeout(provider):
+    """(connect, read) timeout in seconds for a provider (config.HTTP_TIMEOUTS)."""
+    return config.HTTP_TIMEOUTS.get(provider, config.HTTP_TIMEOUTS["default"])
+
+class _TimeoutAdapter(HTTPAdapter):
+    """HTTPAdapter that applies a default timeout when the caller passes none."""
+    def __init__(self, timeout, **kwargs):
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+class _CurlSession:
+    """
+    Reused curl_cffi Session (browser impersonation) that records which local
+    sockets served its requests, since libcurl does not expose pool counters.
+    """
+    def __init__(self, provider, impersonate):
+        from curl_cffi import requests as curl_requests # Only loaded once IDX news is needed
+        self.session = curl_requests.Session(impersonate=impersonate)
+        self.timeout = provider_timeout(provider)
+        self.requests = 0
+        self.sockets = set()
+        self.stats_lock = threading.Lock()
+
+    def get(self, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        response = self.session.get(url, **kwargs)
+        with self.stats_lock:
+            self.requests += 1
+            self.sockets.add((response.local_ip, response.local_port))
+        return response
+
+def get_session(provider):
+    """
+    Returns the pooled requests.Session for a provider (e.g. "marketaux").
+    """
+    with _lock:
+        session = _sessions.get(provider)
+        if session is None:
+            session = requests.Session()
+            adapter = _TimeoutAdapter(
+                provider_timeout(provider),
+                pool_connections=4, # Distinct hosts kept per provider
+                pool_maxsize=config.HTTP_POOL_SIZE
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[provider] = session
+        return session
+
+def get_curl_session(provider, impersonate="chrome120"):
+    """
+    Returns the shared curl_cffi session for a provider that needs browser
+    impersonation (IDX). Safe to share across threads: curl_cffi keeps one
+    curl handle per thread inside a Session.
+    """
+    with _lock:
+        session = _sessions.get(provider)
+        if session is None:
+            session = _CurlSession(provider, impersonate)
+            _sessions[provider] = session
+        return session
+
+def connection_stats():
+    """
+    Connection reuse per provider.
+
+    Returns:
+        dict: provider -> {"requests", "connections", "reuse"}, where reuse is the
+        share of requests served on an already-open connection.
+    """
+    stats = {}
+    with _lock:
+        sessions = list(_sessions.items())
+    for provider, session in sessions:
+        if isinstance(session, _CurlSession):
+            with session.stats_lock:
+                n_requests, n_connections = session.requests, len(session.sockets)
+        else:
+            n_requests = n_connections = 0
+            for adapter in set(session.adapters.values()):
+                pools = adapter.poolmanager.pools
+                for key in pools.keys():
+                    pool = pools.get(key)
+                    if pool is not None:
+                        n_requests += pool.num_requests
+                        n_connections += pool.num_connections
+        if n_requests:
+            stats[provider] = {
+                "requests": n_requests,
+                "connections": n_connections,
+                "reuse": 1 - n_connections / n_requests
+            }
+    return stats
+
+def format_connection_stats():
+    """One-line summary for the scan log, e.g. 'idx 94% (3/52), newsapi 80% (2/10)'."""
+    stats = connection_stats()
+    if not stats:
+        return "no provider requests"
+    return ", ".join(
+        f"{provider} {s['reuse']:.0%} ({s['connections']}/{s['requests']})"
+        for provider, s in sorted(stats.items())
+    )
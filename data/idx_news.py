@@ -1,7 +1,7 @@
 
-from curl_cffi import requests
 import datetime
 import json
+from data.http_sessions import get_curl_session
 
 class IDXNewsFetcher:
     def __init__(self):
@@ -10,6 +10,8 @@ class IDXNewsFetcher:
             "Referer": "https://idx.co.id/id/perusahaan-tercatat/keterbukaan-informasi/",
             "Origin": "https://idx.co.id"
         }
+        # Reused Chrome-impersonating session (keep-alive across symbols)
+        self.session = get_curl_session("idx")
 
     def get_stock_news(self, symbol_jk, days=30):
         """
@@ -19,6 +21,7 @@ class IDXNewsFetcher:
         """
         symbol = symbol_jk.replace(".JK", "")
         news_items = []
+        errors = []
         
         # Date filter (Default 30 days to catch monthly announcements)
         end_date = datetime.datetime.now()
@@ -41,8 +44,8 @@ class IDXNewsFetcher:
                 "lang": "id",
                 "keyword": ""
             }
-            # Use curl_cffi to impersonate Chrome and bypass 403
-            r = requests.get(url_announce, params=params_ann, headers=self.headers, impersonate="chrome120", timeout=15)
+            # curl_cffi session impersonates Chrome to bypass 403
+            r = self.session.get(url_announce, params=params_ann, headers=self.headers)
             
 
 
@@ -59,8 +62,10 @@ class IDXNewsFetcher:
                 # else: pass (silently)
             else:
                 print(f"[IDX Debug] Announcement API failed: {r.status_code}")
+                errors.append(f"Announcement API HTTP {r.status_code}")
         except Exception as e:
             print(f"[IDX News] Error fetching announcements for {symbol}: {e}")
+            errors.append(str(e))
 
         # 2. Fetch Berita (General News Filtered by Keyword)
         try:
@@ -73,7 +78,7 @@ class IDXNewsFetcher:
                 "dateFrom": start_date.strftime("%Y-%m-%d"),
                 "dateTo": end_date.strftime("%Y-%m-%d")
             }
-            r = requests.get(url_news, params=params_news, headers=self.headers, impersonate="chrome120", timeout=15)
+            r = self.session.get(url_news, params=params_news, headers=self.headers)
             
             if r.status_code == 200:
                 data = r.json()
@@ -81,7 +86,14 @@ class IDXNewsFetcher:
                     for item in data["Items"]:
                         title = item.get("Title", "")
                         news_items.append(f"[News] {title}")
+            else:
+                errors.append(f"News API HTTP {r.status_code}")
         except Exception as e:
             print(f"[IDX News] Error fetching news for {symbol}: {e}")
+            errors.append(str(e))
+
+        # Both endpoints down is a provider failure, not an empty result
+        if len(errors) == 2:
+            raise RuntimeError("; ".join(errors))
 
         return news_items
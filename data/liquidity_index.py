@@ -0,0 +1,159 @@
+import os
+import json
+import datetime
+import threading
+import numpy as np
+import sys
+
+# Add parent to path for config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+import data.market_data as market_data
+from indicators.panel import build_panel
+
+# Daily liquidity index over the universe, built from the bar store after an
+# incremental refresh of every universe symbol (scanned or not). The rebuild runs
+# before the session (main.prepare_session), never inside a scan.
+# Per symbol: median traded value (Close x Volume), average volume and days traded
+# over the last N sessions, bucketed into tiers. Live scans skip the tiers that can
+# not plausibly clear the Bandarmology flow filters.
+INDEX_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "liquidity_index.json")
+
+UNKNOWN_TIER = "?" # No, too few or stale bars: always scanned
+
+def compute_liquidity(frames, window=None):
+    """
+    Liquidity stats for every symbol in one vectorized pass over a panel.
+
+    Args:
+        frames (dict): symbol -> OHLCV frame (e.g. from the bar store).
+        window (int): Sessions to look back. Defaults to config.LIQUIDITY_WINDOW.
+
+    Returns:
+        dict: symbol -> {"median_value", "avg_volume", "days_traded", "tier"}
+        Symbols with fewer than `window` bars (new listings) or whose last bar is
+        older than the latest session in `frames` get UNKNOWN_TIER instead of "D".
+    """
+    window = window or config.LIQUIDITY_WINDOW
+    frames = {s: df for s, df in frames.items() if df is not None and not df.empty}
+    if not frames:
+        return {}
+    bar_counts = {s: len(df) for s, df in frames.items()}
+    last_bars = {s: df.index[-1] for s, df in frames.items()}
+    frames = {s: df.tail(window) for s, df in frames.items()}
+
+    panel = build_panel(frames)
+    close = panel.field('Close')[-window:]   # (sessions x symbols)
+    volume = panel.field('Volume')[-window:]
+
+    # Sessions without a bar (suspension, not yet listed) count as zero trade
+    traded = np.nan_to_num(close * volume, nan=0.0)
+    volume = np.nan_to_num(volume, nan=0.0)
+
+    median_value = np.median(traded, axis=0)
+    avg_volume = volume.mean(axis=0)
+    days_traded = (volume > 0).sum(axis=0)
+
+    # Tiers are checked from most to least liquid; anything below the last is "D"
+    tiers = np.full(len(panel.symbols), "D", dtype=object)
+    for tier, limits in reversed(list(config.LIQUIDITY_TIERS.items())):
+        min_days = int(np.ceil(limits["min_days_ratio"] * close.shape[0]))
+        qualifies = (median_value >= limits["min_median_value"]) & (days_traded >= min_days)
+        tiers[qualifies] = tier
+
+    # Too little (or no current) history to judge: keep scanning until it builds up
+    latest = panel.dates[-1]
+    for i, symbol in enumerate(panel.symbols):
+        if bar_counts[symbol] < window or last_bars[symbol] < latest:
+            tiers[i] = UNKNOWN_TIER
+
+    return {
+        symbol: {
+            "median_value": float(median_value[i]),
+            "avg_volume": float(avg_volume[i]),
+            "days_traded": int(days_traded[i]),
+            "tier": tiers[i],
+        }
+        for i, symbol in enumerate(panel.symbols)
+    }
+
+class LiquidityIndex:
+    def __init__(self, path=INDEX_FILE):
+        self.path = path # None keeps the index in memory only (replays)
+        self.lock = threading.Lock()
+        self.built = None
+        self.entries = {}
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            self.built = data.get("built")
+            self.entries = data.get("symbols", {})
+        except Exception as e:
+            print(f"[LIQUIDITY] Cache read error: {e}")
+
+    def _save(self):
+        if not self.path:
+            return
+        try:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({"built": self.built, "symbols": self.entries}, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"[LIQUIDITY] Cache write error: {e}")
+
+    def rebuild(self, symbols, interval=None, frames=None):
+        """
+        Recomputes the index for `symbols` (the whole universe, not just the scan set).
+        Bars are brought up to date first with one incremental bulk download, so
+        symbols filtered out as "D" still get new bars and can move back up a tier.
+        """
+        interval = interval or config.TIMEFRAME
+        try:
+            if frames is None:
+                frames, _ = market_data.fetch_bulk_data(
+                    symbols,
+                    period=config.HISTORY_PERIOD,
+                    interval=interval,
+                    chunk_size=config.DOWNLOAD_CHUNK_SIZE
+                )
+            entries = compute_liquidity(frames)
+        except Exception as e:
+            print(f"[LIQUIDITY] Rebuild failed: {e}")
+            return
+        self.entries = entries
+        self.built = datetime.date.today().isoformat()
+        self._save()
+
+        counts = {}
+        for entry in entries.values():
+            counts[entry["tier"]] = counts.get(entry["tier"], 0) + 1
+        summary = ", ".join(f"{t}: {n}" for t, n in sorted(counts.items()))
+        print(f"[LIQUIDITY] Index rebuilt for {len(entries)}/{len(symbols)} symbols ({summary})")
+
+    def ensure_fresh(self, symbols):
+        """Rebuilds once per day. Called ahead of the scans, which only read the index."""
+        with self.lock:
+            if self.built != datetime.date.today().isoformat():
+                self.rebuild(symbols)
+
+    def tier(self, symbol):
+        entry = self.entries.get(symbol)
+        return entry["tier"] if entry else UNKNOWN_TIER
+
+    def filter(self, symbols, tiers=None):
+        """
+        Symbols whose tier is in `tiers` (default config.LIQUIDITY_SCAN_TIERS),
+        in their original order. Symbols not in the index yet, or without enough
+        current history (UNKNOWN_TIER), are kept. Uses the index as built; a stale
+        one (rebuild pending or failed) is still better than a rebuild mid-scan.
+        """
+        tiers = set(tiers or config.LIQUIDITY_SCAN_TIERS)
+        return [s for s in symbols if self.tier(s) in tiers or self.tier(s) == UNKNOWN_TIER]
+
+liquidity_index = LiquidityIndex()
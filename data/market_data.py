@@ -1,10 +1,29 @@
 import yfinance as yf
 import pandas as pd
 import time
+from data.bar_store import BarStore
+from output.metrics import scan_metrics
+
+# Persistent bar store behind fetch_data / fetch_bulk_data
+bar_store = BarStore()
+
+def _download_window(stored, period, interval):
+    """
+    yf.download kwargs for the bars still missing from `stored`.
+    Re-requests the last stored bar so a still-forming bar gets overwritten.
+    """
+    if not bar_store.is_fresh(stored, period):
+        return {"period": period}
+    last_ts = stored.index[-1]
+    if interval.endswith(("d", "wk", "mo")):
+        return {"start": last_ts.strftime('%Y-%m-%d')}
+    return {"start": last_ts}
 
 def fetch_data(symbol, period="1y", interval="1d"):
     """
     Fetches historical OHLCV data for a given symbol from Yahoo Finance.
+    Only bars after the last stored timestamp are downloaded; the rest is
+    served from the on-disk bar store.
     
     Args:
         symbol (str): Ticker symbol (e.g., 'BBCA.JK')
@@ -15,12 +34,18 @@ def fetch_data(symbol, period="1y", interval="1d"):
         pd.DataFrame: DataFrame containing Date, Open, High, Low, Close, Volume.
                       Returns None if data is invalid or empty.
     """
+    stored = bar_store.load(symbol, interval)
+    window = _download_window(stored, period, interval)
+    
     try:
         # yfinance download
         # auto_adjust=True to handle dividends/splits roughly equivalent to adjusted close
-        df = yf.download(symbol, period=period, interval=interval, progress=False, auto_adjust=False)
+        with scan_metrics.provider("yfinance"):
+            df = yf.download(symbol, interval=interval, progress=False, auto_adjust=False, **window)
         
         if df.empty:
+            if "start" in window:
+                return stored
             print(f"Warning: No data found for {symbol}")
             return None
             
@@ -28,22 +53,218 @@ def fetch_data(symbol, period="1y", interval="1d"):
         if isinstance(df.columns, pd.MultiIndex):
             df.columns = df.columns.get_level_values(0)
             
-        # Required columns check
-        required_cols = ['Open', 'High', 'Low', 'Close', 'Volume']
-        if not all(col in df.columns for col in required_cols):
-             # Try mapping commonly found alternative names if necessary, 
-             # but yfinance standardizes to Title Case usually.
-             print(f"Warning: Missing columns for {symbol}. Found: {df.columns}")
-             return None
-             
-        df = df[required_cols]
-        df.dropna(inplace=True)
+        df, error = _clean_ohlcv(df)
+        if error:
+            if "start" in window:
+                return stored
+            print(f"Warning: {error} for {symbol}")
+            return None
         
-        return df
+        if "start" not in window:
+            stored = None
+        return bar_store.merge(symbol, interval, df, period=period, stored=stored)
 
     except Exception as e:
         print(f"Error fetching data for {symbol}: {e}")
-        return None
+        # Serve the last stored bars rather than dropping the symbol
+        return stored if "start" in window else None
+
+def _clean_ohlcv(df):
+    """
+    Applies the fetch_data column contract: Open, High, Low, Close, Volume
+    with NaN rows dropped.
+
+    Returns:
+        tuple: (pd.DataFrame or None, error message or None)
+    """
+    # Required columns check
+    required_cols = ['Open', 'High', 'Low', 'Close', 'Volume']
+    if not all(col in df.columns for col in required_cols):
+        # Try mapping commonly found alternative names if necessary, 
+        # but yfinance standardizes to Title Case usually.
+        return None, f"Missing columns. Found: {list(df.columns)}"
+        
+    df = df[required_cols].dropna()
+    if df.empty:
+        return None, "No data found"
+    
+    return df, None
+
+def _split_symbol_frame(df, symbol):
+    """
+    Extracts one symbol's columns from a multi-ticker yf.download result.
+    Handles both (Ticker, Price) and (Price, Ticker) column layouts.
+    """
+    if not isinstance(df.columns, pd.MultiIndex):
+        return df
+    
+    for level in range(df.columns.nlevels):
+        if symbol in df.columns.get_level_values(level):
+            return df.xs(symbol, axis=1, level=level)
+    return None
+
+def _download_chunks(symbols, interval, chunk_size, **window):
+    """
+    Downloads `symbols` in chunks of `chunk_size` tickers per request.
+
+    Returns:
+        tuple: (frames, failures) keyed by symbol.
+    """
+    frames = {}
+    failures = {}
+    
+    for i in range(0, len(symbols), chunk_size):
+        chunk = list(symbols[i:i + chunk_size])
+        try:
+            with scan_metrics.provider("yfinance"):
+                raw = yf.download(chunk, interval=interval, progress=False, auto_adjust=False,
+                                  group_by='ticker', threads=True, **window)
+        except Exception as e:
+            print(f"Error fetching chunk {chunk[0]}..{chunk[-1]}: {e}")
+            for symbol in chunk:
+                failures[symbol] = str(e)
+            continue
+            
+        if raw is None or raw.empty:
+            for symbol in chunk:
+                failures[symbol] = "No data found"
+            continue
+            
+        for symbol in chunk:
+            df = _split_symbol_frame(raw, symbol)
+            if df is None:
+                failures[symbol] = "Not in response"
+                continue
+                
+            df, error = _clean_ohlcv(df)
+            if error:
+                failures[symbol] = error
+                continue
+                
+            frames[symbol] = df
+            
+    return frames, failures
+
+def fetch_bulk_data(symbols, period="1y", interval="1d", chunk_size=100):
+    """
+    Fetches historical OHLCV data for many symbols, downloading `chunk_size`
+    tickers per Yahoo Finance request instead of one request per symbol.
+    Symbols already in the bar store only download bars after their last
+    stored timestamp.
+    
+    Args:
+        symbols (list): Ticker symbols (e.g., ['BBCA.JK', 'BBRI.JK'])
+        period (str): Data period to download (default: '1y')
+        interval (str): Data interval (default: '1d')
+        chunk_size (int): Number of tickers per request (default: 100)
+        
+    Returns:
+        tuple: (frames, failures)
+            frames (dict): symbol -> pd.DataFrame with the same columns as fetch_data.
+            failures (dict): symbol -> reason for every symbol without usable data.
+    """
+    frames = {}
+    failures = {}
+    
+    # Group symbols by download window: cold symbols need the full period,
+    # warm ones share a start date (usually the last trading day).
+    stored_frames = {}
+    groups = {}
+    for symbol in symbols:
+        stored = bar_store.load(symbol, interval)
+        window = _download_window(stored, period, interval)
+        if "start" in window:
+            stored_frames[symbol] = stored
+        key = tuple(sorted(window.items()))
+        groups.setdefault(key, []).append(symbol)
+    # Bar store hit = only bars after the stored ones are downloaded
+    scan_metrics.cache("bars", hits=len(stored_frames), misses=len(symbols) - len(stored_frames))
+        
+    for key, group in groups.items():
+        window = dict(key)
+        fetched, group_failures = _download_chunks(group, interval, chunk_size, **window)
+        
+        for symbol in group:
+            stored = stored_frames.get(symbol)
+            if symbol in fetched:
+                frames[symbol] = bar_store.merge(symbol, interval, fetched[symbol],
+                                                 period=period, stored=stored)
+            elif stored is not None:
+                # Nothing new (or a failed refresh): serve the stored bars
+                frames[symbol] = stored
+            else:
+                failures[symbol] = group_failures.get(symbol, "No data found")
+            
+    if failures:
+        print(f"Warning: No usable data for {len(failures)}/{len(symbols)} symbols.")
+        
+    return frames, failures
+
+def fetch_live_quotes(symbols, chunk_size=100):
+    """
+    Today's bar (open, day high/low, last price, cumulative volume) for many symbols,
+    one Yahoo Finance request per `chunk_size` tickers.
+    (fast_info['last_price'] resolves through a price-history request per ticker,
+    so a bulk one-day download is the cheaper way to quote a whole universe.)
+
+    Returns:
+        tuple: (quotes, failures) - quotes maps symbol -> pd.Series (Open, High, Low,
+        Close, Volume) named by the bar timestamp.
+    """
+    frames, failures = _download_chunks(symbols, "1d", chunk_size, period="1d")
+    quotes = {symbol: df.iloc[-1] for symbol, df in frames.items()}
+    return quotes, failures
+
+def fetch_latest_bars(symbols, period="1y", interval="1d", chunk_size=100):
+    """
+    Live-scan version of fetch_bulk_data. Symbols whose stored daily history ends
+    in today's session only get today's bar from fetch_live_quotes, patched into
+    the last row of the stored frame (older bars untouched). On the first quote of
+    a new session the symbol goes through fetch_bulk_data instead, which re-requests
+    the last stored (mid-session) bar so it is finalized before today's is added.
+    Cold or gapped symbols, and any non-daily interval, go through fetch_bulk_data.
+
+    Returns:
+        tuple: (frames, failures), same as fetch_bulk_data.
+    """
+    if interval != "1d":
+        return fetch_bulk_data(symbols, period=period, interval=interval, chunk_size=chunk_size)
+
+    stored_frames = {}
+    for symbol in symbols:
+        stored = bar_store.load(symbol, interval)
+        if stored is not None and bar_store.is_fresh(stored, period):
+            stored_frames[symbol] = stored
+
+    frames = {}
+    backfill = [s for s in symbols if s not in stored_frames]
+    quotes = {}
+    # Backfilled symbols are counted by fetch_bulk_data
+    scan_metrics.cache("bars", hits=len(stored_frames))
+    if stored_frames:
+        quotes, _ = fetch_live_quotes(list(stored_frames), chunk_size=chunk_size)
+        for symbol, stored in stored_frames.items():
+            quote = quotes.get(symbol)
+            if quote is None:
+                # No quote (suspended, not traded yet): the stored bars are still valid
+                frames[symbol] = stored
+            elif pd.Timestamp(quote.name).date() <= stored.index[-1].date():
+                frames[symbol] = bar_store.patch_last_bar(symbol, interval, quote, period=period, stored=stored)
+            else:
+                # New session (or missed ones): finalize the stored bars incrementally
+                backfill.append(symbol)
+
+    failures = {}
+    if backfill:
+        fetched, failures = fetch_bulk_data(backfill, period=period, interval=interval, chunk_size=chunk_size)
+        for symbol, df in fetched.items():
+            quote = quotes.get(symbol)
+            # The quote may be newer than the bulk download's last bar
+            if quote is not None:
+                df = bar_store.patch_last_bar(symbol, interval, quote, period=period, stored=df)
+            frames[symbol] = df
+        
+    return frames, failures
 
 def get_latest_news(symbol):
     """
@@ -0,0 +1,154 @@
+import os
+import json
+import time
+import threading
+import datetime
+import sys
+
+# Add parent to path for config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+# Central quota scheduler for the news providers and Gemini.
+# Each provider has a token bucket for its per-minute limit (and optionally one for
+# tokens per minute) plus a daily request budget. Daily usage is persisted, so a
+# restart (or the next CI session) does not forget what was already spent today.
+QUOTA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "provider_quota.json")
+
+class TokenBucket:
+    """Refills `rate_per_minute` tokens per minute up to one minute's worth."""
+    def __init__(self, rate_per_minute):
+        self.capacity = float(rate_per_minute)
+        self.rate = rate_per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount=1):
+        """Seconds until `amount` tokens are available (0 if they are now)."""
+        self._refill()
+        amount = min(amount, self.capacity) # Oversized requests just need a full bucket
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount=1):
+        self.tokens -= min(amount, self.capacity)
+
+    def drain(self):
+        self._refill()
+        self.tokens = 0.0
+
+class QuotaScheduler:
+    def __init__(self, limits=None, path=QUOTA_FILE):
+        self.limits = limits if limits is not None else config.PROVIDER_LIMITS
+        self.path = path
+        self.lock = threading.Lock()
+        self.requests = {p: TokenBucket(l["per_minute"]) for p, l in self.limits.items() if l.get("per_minute")}
+        self.tokens = {p: TokenBucket(l["tokens_per_minute"]) for p, l in self.limits.items() if l.get("tokens_per_minute")}
+        self.day, self.used = self._load()
+
+    def _today(self):
+        # Provider budgets reset on UTC days
+        return datetime.datetime.now(datetime.timezone.utc).date().isoformat()
+
+    def _load(self):
+        today = self._today()
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+                if data.get("date") == today:
+                    return today, data.get("used", {})
+            except Exception as e:
+                print(f"[QUOTA] Cache read error: {e}")
+        return today, {}
+
+    def _save(self):
+        try:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({"date": self.day, "used": self.used}, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"[QUOTA] Cache write error: {e}")
+
+    def _roll_day(self):
+        today = self._today()
+        if today != self.day:
+            self.day, self.used = today, {}
+
+    def remaining(self, provider):
+        """
+        Requests left in today's budget, or None if the provider has no daily cap.
+        """
+        per_day = self.limits.get(provider, {}).get("per_day")
+        if per_day is None:
+            return None
+        with self.lock:
+            self._roll_day()
+            return max(0, per_day - self.used.get(provider, 0))
+
+    def is_exhausted(self, provider):
+        remaining = self.remaining(provider)
+        return remaining is not None and remaining <= 0
+
+    def acquire(self, provider, tokens=0, timeout=None):
+        """
+        Reserves one request (and `tokens` prompt tokens) for `provider`, waiting for
+        the rate limit at most `timeout` seconds.
+
+        Returns:
+            bool: False if the daily budget is spent or the wait would exceed timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self.lock:
+                self._roll_day()
+                per_day = self.limits.get(provider, {}).get("per_day")
+                if per_day is not None and self.used.get(provider, 0) >= per_day:
+                    return False
+                
+                buckets = [(self.requests.get(provider), 1), (self.tokens.get(provider), tokens)]
+                buckets = [(b, n) for b, n in buckets if b is not None and n]
+                wait = max([b.wait_time(n) for b, n in buckets], default=0.0)
+                if wait == 0:
+                    for bucket, amount in buckets:
+                        bucket.take(amount)
+                    self.used[provider] = self.used.get(provider, 0) + 1
+                    self._save()
+                    return True
+                    
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def mark_exhausted(self, provider):
+        """Provider reported its daily quota as spent (e.g. a per-day 429)."""
+        with self.lock:
+            self._roll_day()
+            per_day = self.limits.get(provider, {}).get("per_day")
+            if per_day is not None:
+                self.used[provider] = max(self.used.get(provider, 0), per_day)
+                self._save()
+
+    def throttle(self, provider):
+        """Provider answered 429 for its per-minute limit: empty the bucket so callers wait."""
+        with self.lock:
+            for buckets in (self.requests, self.tokens):
+                if provider in buckets:
+                    buckets[provider].drain()
+
+    def summary(self):
+        """Remaining daily budget per capped provider, e.g. 'newsapi 37/100'."""
+        parts = []
+        for provider, limit in sorted(self.limits.items()):
+            if limit.get("per_day") is not None:
+                parts.append(f"{provider} {self.remaining(provider)}/{limit['per_day']}")
+        return ", ".join(parts)
+
+provider_quota = QuotaScheduler()
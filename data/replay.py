@@ -0,0 +1,139 @@
+import time
+import datetime
+import numpy as np
+import pandas as pd
+
+# Offline market replay.
+# A simulated clock and a bar source stand in for the wall clock and Yahoo Finance, so
+# run_scan / start_bot can step through a recorded (bar store) or synthetic trading day
+# faster than real time and with no network. Runs are deterministic: the clock only
+# moves when the bot sleeps, and today's bar is a fixed function of the clock.
+
+WIB = datetime.timezone(datetime.timedelta(hours=7))
+# Same trading window as main.is_market_open
+SESSION_OPEN = datetime.time(8, 0)
+SESSION_CLOSE = datetime.time(16, 0)
+
+FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+# Intraday path knots (fraction of the session) for intraday_bar
+PATH_KNOTS = [0.0, 1 / 3, 2 / 3, 1.0]
+
+class SimClock:
+    """
+    Stand-in for the wall clock (WIB). Time only advances through sleep();
+    `speed` is the real-time multiplier for those sleeps (0 = don't wait at all).
+    """
+    def __init__(self, start, speed=0):
+        self.current = start
+        self.speed = speed
+
+    def now(self):
+        return self.current
+
+    def sleep(self, seconds):
+        if self.speed > 0:
+            time.sleep(seconds / self.speed)
+        self.current += datetime.timedelta(seconds=seconds)
+
+def session_start(day):
+    """Session open of `day` as a WIB datetime, where replays start."""
+    return datetime.datetime.combine(day, SESSION_OPEN, tzinfo=WIB)
+
+def session_fraction(now):
+    """How far `now` is through its day's session (< 0 before open, > 1 after close)."""
+    open_ = session_start(now.date())
+    close = datetime.datetime.combine(now.date(), SESSION_CLOSE, tzinfo=WIB)
+    return (now - open_) / (close - open_)
+
+def intraday_bar(bar, fraction):
+    """
+    A daily bar (Open, High, Low, Close, Volume) as it stood `fraction` of the way
+    through the session. Price walks Open -> Low -> High -> Close on up days
+    (Open -> High -> Low -> Close on down days) and volume accrues linearly, so the
+    bar ends exactly as recorded.
+    """
+    o, h, l, c, v = bar
+    path = [o, l, h, c] if c >= o else [o, h, l, c]
+    price = float(np.interp(fraction, PATH_KNOTS, path))
+    seen = [p for knot, p in zip(PATH_KNOTS, path) if knot <= fraction] + [price]
+    return [o, max(seen), min(seen), price, v * fraction]
+
+class ReplaySource:
+    """
+    fetch_bulk_data / fetch_latest_bars over in-memory daily frames, cut at the clock:
+    bars before today are served as recorded, today's bar is rebuilt with intraday_bar
+    and later bars are hidden. Drop-in for data.market_data in ScanPipeline.
+    """
+    def __init__(self, frames, clock):
+        self.frames = {}
+        self.days = {}
+        for symbol, df in frames.items():
+            if df is None or df.empty:
+                continue
+            df = df[FIELDS].astype(float)
+            index = df.index.tz_localize(None) if df.index.tz is not None else df.index
+            self.frames[symbol] = df
+            self.days[symbol] = index.normalize().to_numpy()
+        self.symbols = list(self.frames)
+        self.clock = clock
+        # Alerts the bot would have sent, and (sim time, seconds, results) per scan
+        self.alerts = []
+        self.scans = []
+
+    def last_day(self):
+        """Latest session in the data, the default day to replay."""
+        return max(pd.Timestamp(days[-1]) for days in self.days.values()).date()
+
+    def bars(self, symbol, now=None):
+        """The symbol's frame as of `now` (default: the clock), or None before its first bar."""
+        df = self.frames.get(symbol)
+        if df is None:
+            return None
+        now = now or self.clock.now()
+        days = self.days[symbol]
+        today = np.datetime64(now.date(), 'ns')
+        pos = int(np.searchsorted(days, today))
+
+        fraction = session_fraction(now)
+        if pos < len(days) and days[pos] == today and fraction >= 0:
+            out = df.iloc[:pos + 1].copy()
+            out.iloc[-1] = intraday_bar(df.iloc[pos].to_numpy(), min(fraction, 1.0))
+            return out
+        return df.iloc[:pos].copy() if pos else None
+
+    def history(self, day=None):
+        """Completed bars before `day` (default: the clock's date), e.g. for the liquidity index."""
+        day = day or self.clock.now().date()
+        before = session_start(day) - datetime.timedelta(minutes=1)
+        return {s: self.bars(s, now=before) for s in self.symbols}
+
+    def fetch_bulk_data(self, symbols, period="1y", interval="1d", chunk_size=100):
+        """Same contract as data.market_data.fetch_bulk_data (daily bars only)."""
+        frames = {}
+        failures = {}
+        for symbol in symbols:
+            df = self.bars(symbol)
+            if df is None or df.empty:
+                failures[symbol] = "No replay data"
+            else:
+                frames[symbol] = df
+        return frames, failures
+
+    # Today's bar is already rebuilt on every call
+    fetch_latest_bars = fetch_bulk_data
+
+    def record_alert(self, result):
+        """send_alert stand-in: keeps the alert instead of sending it."""
+        self.alerts.append((self.clock.now(), result['symbol'], result['decision'], result['score']))
+        return True
+
+    def record_scan(self, seconds, results):
+        self.scans.append((self.clock.now(), seconds, len(results)))
+
+    def summary(self):
+        if not self.scans:
+            return "no scans"
+        seconds = np.array([s for _, s, _ in self.scans])
+        return (f"{len(self.scans)} scans ({self.scans[0][0]:%H:%M}-{self.scans[-1][0]:%H:%M} sim), "
+                f"scan p50 {np.median(seconds):.2f}s / p95 {np.percentile(seconds, 95):.2f}s / "
+                f"max {seconds.max():.2f}s, total {seconds.sum():.1f}s, {len(self.alerts)} alerts")
@@ -2,6 +2,7 @@ import requests
 import json
 import os
 import datetime
+from data.symbol_metadata import METADATA_FILE, save_metadata
 
 # Cache file to store the universe so we don't spam the source
 CACHE_FILE = "data/idx_universe_cache.json"
@@ -12,8 +13,8 @@ def fetch_idx_universe():
     Fetches the list of all IDX stocks from a reliable public source.
     Returns a list of symbols in Yahoo Finance format (e.g., 'BBCA.JK').
     """
-    # Check cache first
-    if os.path.exists(CACHE_FILE):
+    # Check cache first (the metadata index is built from the same download)
+    if os.path.exists(CACHE_FILE) and os.path.exists(METADATA_FILE):
         try:
             with open(CACHE_FILE, 'r') as f:
                 data = json.load(f)
@@ -43,6 +44,12 @@ def fetch_idx_universe():
                     "symbols": symbols
                 }, f)
                 
+            # Symbol metadata (name, sector, board, listing date) for O(1) lookups
+            try:
+                save_metadata(data)
+            except Exception as e:
+                print(f"[UNIVERSE] Metadata save failed: {e}")
+                
             print(f"[UNIVERSE] Successfully fetched {len(symbols)} stocks.")
             return symbols
         else:
@@ -0,0 +1,94 @@
+import os
+import json
+import threading
+import datetime
+
+# Local symbol metadata (company name, sector, board, listing date), built from the same
+# IDX company list that fetch_idx_universe downloads. Lookups are plain dict reads, so
+# alerts and result tagging never need a yfinance .info round-trip.
+METADATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "idx_metadata_cache.json")
+
+# Field names seen in IDX company-profile payloads, most specific first
+FIELD_ALIASES = {
+    "name": ["NamaEmiten", "namaEmiten", "Nama", "name", "longName"],
+    "sector": ["Sektor", "sektor", "Sector", "sector"],
+    "board": ["PapanPencatatan", "papanPencatatan", "Board", "board"],
+    "listing_date": ["TanggalPencatatan", "tanggalPencatatan", "ListingDate", "listingDate"],
+}
+
+def _pick(details, aliases):
+    for key in aliases:
+        value = details.get(key)
+        if value not in (None, ""):
+            return value
+    return None
+
+def _profile(details):
+    """Details are either a flat dict or wrapped as {'Profiles': [{...}]}."""
+    if isinstance(details, dict):
+        profiles = details.get("Profiles") or details.get("profiles")
+        if isinstance(profiles, list) and profiles and isinstance(profiles[0], dict):
+            return {**details, **profiles[0]}
+        return details
+    return {}
+
+def build_metadata(raw):
+    """
+    Converts the IDX company list (ticker -> details) into symbol -> metadata.
+    """
+    metadata = {}
+    for ticker, details in raw.items():
+        profile = _profile(details)
+        entry = {field: _pick(profile, aliases) for field, aliases in FIELD_ALIASES.items()}
+        if entry["listing_date"]:
+            entry["listing_date"] = str(entry["listing_date"])[:10]
+        metadata[f"{ticker}.JK"] = entry
+    return metadata
+
+def save_metadata(raw, path=METADATA_FILE):
+    metadata = build_metadata(raw)
+    with open(path, 'w') as f:
+        json.dump({
+            "last_updated": datetime.datetime.now().isoformat(),
+            "symbols": metadata
+        }, f)
+    return metadata
+
+class SymbolMetadataIndex:
+    def __init__(self, path=METADATA_FILE):
+        self.path = path
+        self.entries = {}
+        self.loaded_mtime = None
+        self.lock = threading.Lock()
+
+    def _ensure_loaded(self):
+        # Re-read only when the daily universe refresh rewrote the file
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime == self.loaded_mtime:
+            return
+        with self.lock:
+            if mtime == self.loaded_mtime:
+                return
+            try:
+                with open(self.path, 'r') as f:
+                    self.entries = json.load(f).get("symbols", {})
+                self.loaded_mtime = mtime
+            except Exception as e:
+                print(f"[METADATA] Cache read error: {e}")
+
+    def lookup(self, symbol):
+        self._ensure_loaded()
+        return self.entries.get(symbol)
+
+    def name(self, symbol):
+        entry = self.lookup(symbol)
+        return (entry or {}).get("name") or symbol
+
+    def sector(self, symbol):
+        entry = self.lookup(symbol)
+        return (entry or {}).get("sector") or "Unknown"
+
+symbol_metadata = SymbolMetadataIndex()
@@ -0,0 +1,211 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from indicators.streaming import INDICATOR_COLUMNS, MIN_BARS
+
+# Cross-sectional ("panel") mode for add_indicators.
+# All symbols live in one (symbols x dates x fields) float array, so every indicator
+# is computed for the whole universe in a single vectorized pass instead of ~900
+# separate pandas/ta calls. Symbol-major layout keeps each symbol's rows contiguous,
+# which lets per-symbol frames be handed out as zero-copy views.
+
+FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+PANEL_COLUMNS = FIELDS + INDICATOR_COLUMNS
+
+
+class Panel:
+    """
+    Aligned OHLCV arrays for many symbols on a shared date index.
+    Dates where a symbol has no bar (before its IPO, suspensions) are NaN.
+    """
+    def __init__(self, dates, symbols, values):
+        self.dates = dates
+        self.symbols = list(symbols)
+        self.values = values # shape (symbols, dates, len(FIELDS))
+        self.positions = {s: i for i, s in enumerate(self.symbols)}
+
+    def field(self, name):
+        """Returns a (dates x symbols) view of one OHLCV field."""
+        return self.values[:, :, FIELDS.index(name)].T
+
+
+def build_panel(frames, symbols=None):
+    """
+    Aligns per-symbol OHLCV frames (as returned by fetch_data) on the union of their dates.
+
+    Args:
+        frames (dict): symbol -> pd.DataFrame with Open, High, Low, Close, Volume.
+        symbols (list): Column order. Defaults to the dict order of `frames`.
+
+    Returns:
+        Panel
+    """
+    if symbols is None:
+        symbols = list(frames.keys())
+    symbols = [s for s in symbols if frames.get(s) is not None]
+
+    dates = pd.DatetimeIndex([])
+    for symbol in symbols:
+        dates = dates.union(frames[symbol].index)
+
+    values = np.full((len(symbols), len(dates), len(FIELDS)), np.nan)
+    for j, symbol in enumerate(symbols):
+        df = frames[symbol]
+        rows = dates.get_indexer(df.index)
+        values[j, rows, :] = df[FIELDS].to_numpy(dtype=float)
+
+    return Panel(dates, symbols, values)
+
+
+def _rolling(packed, window, reducer):
+    """Rolling reduction along time; NaN wherever the window reaches into missing history."""
+    out = np.full(packed.shape, np.nan)
+    if packed.shape[1] >= window:
+        out[:, window - 1:] = reducer(sliding_window_view(packed, window, axis=1), axis=-1)
+    return out
+
+
+def _wilder_rsi(close, first, window=14):
+    """Vectorized ta.momentum.RSIIndicator on right-aligned (packed) closes."""
+    n_sym, n_dates = close.shape
+    alpha = 1.0 / window
+    diff = np.diff(close, axis=1, prepend=np.nan)
+    up = np.where(diff > 0, diff, 0.0) # NaN diff (first bar) -> 0, as in ta
+    down = np.where(diff < 0, -diff, 0.0)
+
+    ema_up = np.full(close.shape, np.nan)
+    ema_down = np.full(close.shape, np.nan)
+    prev_up = np.full(n_sym, np.nan)
+    prev_down = np.full(n_sym, np.nan)
+    for t in range(n_dates):
+        started = t >= first
+        new_up = np.where(np.isnan(prev_up), up[:, t], (1 - alpha) * prev_up + alpha * up[:, t])
+        new_down = np.where(np.isnan(prev_down), down[:, t], (1 - alpha) * prev_down + alpha * down[:, t])
+        prev_up = np.where(started, new_up, np.nan)
+        prev_down = np.where(started, new_down, np.nan)
+        ema_up[:, t] = prev_up
+        ema_down[:, t] = prev_down
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = np.where(ema_down == 0, 100.0, 100 - (100 / (1 + ema_up / ema_down)))
+    bar_no = np.arange(n_dates)[None, :] - first[:, None]
+    rsi[bar_no < window - 1] = np.nan
+    return rsi
+
+
+def _wilder_atr(high, low, close, first, window=14):
+    """Vectorized ta.volatility.AverageTrueRange on right-aligned (packed) bars."""
+    n_sym, n_dates = close.shape
+    prev_close = np.concatenate([np.full((n_sym, 1), np.nan), close[:, :-1]], axis=1)
+    # fmax skips NaN like the DataFrame.max(axis=1) inside ta
+    tr = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    seed = _rolling(tr, window, np.mean)
+
+    atr = np.full(close.shape, np.nan)
+    prev = np.full(n_sym, np.nan)
+    for t in range(n_dates):
+        bar_no = t - first
+        smoothed = (prev * (window - 1) + tr[:, t]) / window
+        prev = np.where(bar_no < 0, np.nan,
+               np.where(bar_no < window - 1, 0.0,
+               np.where(bar_no == window - 1, seed[:, t], smoothed)))
+        atr[:, t] = prev
+    return atr
+
+
+class PanelIndicators:
+    """
+    OHLCV plus every add_indicators column for a whole panel.
+    Per-symbol frames and last-row snapshots are views into one array.
+    """
+    def __init__(self, dates, symbols, values, counts, order):
+        self.dates = dates
+        self.symbols = symbols
+        self.values = values # shape (symbols, dates, len(PANEL_COLUMNS))
+        self.counts = counts # bars per symbol
+        self.order = order   # packed position -> date position, per symbol
+        self.positions = {s: i for i, s in enumerate(symbols)}
+
+    def field(self, name):
+        """Returns a (dates x symbols) view of one column."""
+        return self.values[:, :, PANEL_COLUMNS.index(name)].T
+
+    def frame(self, symbol):
+        """
+        Returns the symbol's add_indicators-style frame from its first bar onwards,
+        as a view (no copy). Suspension days inside the history stay as NaN rows.
+        """
+        j = self.positions[symbol]
+        n_dates = len(self.dates)
+        start = self.order[j, n_dates - self.counts[j]] if self.counts[j] else n_dates
+        return pd.DataFrame(self.values[j, start:], index=self.dates[start:],
+                            columns=PANEL_COLUMNS, copy=False)
+
+    def last_row(self, symbol, lag=0):
+        """Returns the symbol's lag-th most recent bar as a 1-D view, or None."""
+        j = self.positions[symbol]
+        if self.counts[j] <= lag:
+            return None
+        return self.values[j, self.order[j, len(self.dates) - 1 - lag]]
+
+    def last_rows(self):
+        """
+        Snapshot of every symbol's latest bar (indexed by symbol) with the previous
+        close and bar count attached, as used by ConfluenceStrategy.screen_batch.
+        """
+        n_sym, n_dates = len(self.symbols), len(self.dates)
+        rows = np.arange(n_sym)
+        last = self.order[:, n_dates - 1]
+        prev = self.order[:, max(n_dates - 2, 0)]
+        snapshot = pd.DataFrame(self.values[rows, last], index=self.symbols, columns=PANEL_COLUMNS)
+        snapshot['PrevClose'] = np.where(self.counts >= 2, self.values[rows, prev, FIELDS.index('Close')], np.nan)
+        snapshot['Bars'] = self.counts
+        snapshot['Date'] = self.dates[last] if n_dates else pd.NaT
+        snapshot.loc[self.counts == 0, 'Date'] = pd.NaT
+        return snapshot
+
+
+def compute_panel_indicators(panel):
+    """
+    Computes every add_indicators column for all symbols of a Panel in one pass.
+
+    Ragged histories (new IPOs, suspensions) are handled by packing each symbol's
+    valid bars to the end of the time axis, so rolling windows count bars, not
+    calendar dates, exactly like the per-symbol path. Symbols with fewer than
+    50 bars get NaN indicators (add_indicators leaves those frames untouched).
+
+    Returns:
+        PanelIndicators
+    """
+    n_sym, n_dates, _ = panel.values.shape
+    valid = np.isfinite(panel.values).all(axis=2)
+    counts = valid.sum(axis=1)
+    first = n_dates - counts # first packed position holding data
+
+    # Stable sort puts missing dates first and keeps the bar order of valid ones
+    order = np.argsort(valid, axis=1, kind='stable')
+    packed = np.take_along_axis(panel.values, order[:, :, None], axis=1)
+    packed[~np.take_along_axis(valid, order, axis=1)] = np.nan
+    o, h, l, c, v = (packed[:, :, i] for i in range(len(FIELDS)))
+
+    with np.errstate(invalid='ignore'):
+        indicators = {
+            'MA20': _rolling(c, 20, np.mean),
+            'MA50': _rolling(c, 50, np.mean),
+            'RSI': _wilder_rsi(c, first),
+            'VolMA20': _rolling(v, 20, np.mean),
+            'Support20': _rolling(l, 20, np.min),
+            'Resistance20': _rolling(h, 20, np.max),
+            'ATR': _wilder_atr(h, l, c, first),
+        }
+
+    result = np.empty((n_sym, n_dates, len(PANEL_COLUMNS)))
+    result[:, :, :len(FIELDS)] = packed
+    for i, col in enumerate(INDICATOR_COLUMNS):
+        result[:, :, len(FIELDS) + i] = indicators[col]
+    result[counts < MIN_BARS, :, len(FIELDS):] = np.nan
+
+    # Scatter packed rows back to their dates
+    values = np.empty_like(result)
+    np.put_along_axis(values, order[:, :, None], result, axis=1)
+    return PanelIndicators(panel.dates, panel.symbols, values, counts, order)
@@ -1,6 +1,10 @@
 
 import os
-import google.generativeai as genai
+import re
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 import yfinance as yf
 from datetime import datetime, timedelta
 import sys
@@ -9,21 +13,179 @@ import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
 
-# Configure Gemini
-if config.GENAI_API_KEY:
-    genai.configure(api_key=config.GENAI_API_KEY)
-
-
+from scan_pipeline import stage_slot
+from indicators.sentiment_cache import SentimentCache
+from data.rate_limiter import provider_quota
+from data.circuit_breaker import news_breakers, SymbolNotFound
+from output.metrics import scan_metrics
 from data.idx_news import IDXNewsFetcher
 from data.external_news import FinnhubNewsFetcher, PolygonNewsFetcher, MarketAuxFetcher, NewsAPIFetcher, NewsDataFetcher
 
-# Init Fetchers
-idx_fetcher = IDXNewsFetcher()
-finnhub_fetcher = FinnhubNewsFetcher()
-polygon_fetcher = PolygonNewsFetcher()
-marketaux_fetcher = MarketAuxFetcher()
-newsapi_fetcher = NewsAPIFetcher()
-newsdata_fetcher = NewsDataFetcher()
+# Fetchers (and the SDK clients inside them) are built on first use
+_fetchers = {}
+_fetchers_lock = threading.Lock()
+
+def _fetcher(cls):
+    with _fetchers_lock:
+        if cls not in _fetchers:
+            _fetchers[cls] = cls()
+        return _fetchers[cls]
+
+# (name, API key setting, fetch function) in the order headlines are passed to Gemini.
+# name.lower() is the provider key in config.PROVIDER_LIMITS.
+NEWS_PROVIDERS = [
+    ("IDX", None, lambda symbol: _fetcher(IDXNewsFetcher).get_stock_news(symbol, days=7)),
+    ("Finnhub", "FINNHUB_API_KEY", lambda symbol: _fetcher(FinnhubNewsFetcher).get_company_news(symbol, days=7)),
+    ("Polygon", "POLYGON_API_KEY", lambda symbol: _fetcher(PolygonNewsFetcher).get_company_news(symbol, limit=5)),
+    ("MarketAux", "MARKETAUX_API_KEY", lambda symbol: _fetcher(MarketAuxFetcher).get_company_news(symbol, limit=3)),
+    ("NewsAPI", "NEWSAPI_KEY", lambda symbol: _fetcher(NewsAPIFetcher).get_company_news(symbol, days=7)),
+    ("NewsData", "NEWSDATA_KEY", lambda symbol: _fetcher(NewsDataFetcher).get_company_news(symbol, limit=3)),
+]
+
+QUOTA_SKIP_REASON = "Sentiment Check Skipped (API Quota Limit)"
+
+# Shared pool for provider requests; its size is the "news" stage limit.
+# Requests that miss the deadline keep running here, they just aren't waited for.
+news_pool = ThreadPoolExecutor(max_workers=config.STAGE_LIMITS["news"], thread_name_prefix="news")
+
+# Gemini verdicts keyed by symbol + headline fingerprint, persisted across runs
+sentiment_cache = SentimentCache(
+    ttl_minutes=config.SENTIMENT_CACHE_TTL_MINUTES,
+    max_entries=config.SENTIMENT_CACHE_MAX_ENTRIES
+)
+
+# symbol -> providers that missed the deadline on the latest lookup
+LATE_PROVIDERS = {}
+
+def _fetch_provider(name, fetch, symbol, deadline_at, started):
+    provider = name.lower()
+    started[name] = time.monotonic()
+    # Wait for a rate-limit slot only as long as the headlines could still be used
+    remaining = deadline_at - started[name]
+    if remaining <= 0 or not provider_quota.acquire(provider, timeout=remaining):
+        news_breakers.release(provider, symbol)
+        return []
+    try:
+        with scan_metrics.provider(provider):
+            headlines = fetch(symbol) or []
+    except SymbolNotFound:
+        news_breakers.record_not_found(provider, symbol)
+        return []
+    except Exception as e:
+        print(f"[NEWS] {name} failed for {symbol}: {e}")
+        news_breakers.record_failure(provider, symbol)
+        return []
+    news_breakers.record_result(provider, symbol, headlines)
+    return headlines
+
+def _collect_headlines(symbol, deadline=None):
+    """
+    Queries IDX, Finnhub, Polygon, MarketAux, NewsAPI and NewsData concurrently.
+    Headlines from providers that answer within `deadline` seconds are returned
+    in provider order. Providers still running at the deadline are dropped and
+    recorded in LATE_PROVIDERS; requests that never left the busy news pool are
+    cancelled without blaming the provider.
+    """
+    if deadline is None:
+        deadline = config.NEWS_DEADLINE_SECONDS
+    deadline_at = time.monotonic() + deadline
+    started = {} # provider name -> monotonic time its request left the pool queue
+        
+    # Providers without a key, with today's budget spent, with an open circuit
+    # breaker or known to have nothing for this symbol are not queried at all
+    futures = [(name, news_pool.submit(_fetch_provider, name, fetch, symbol, deadline_at, started))
+               for name, key_setting, fetch in NEWS_PROVIDERS
+               if (key_setting is None or getattr(config, key_setting))
+               and not provider_quota.is_exhausted(name.lower())
+               and news_breakers.allow(name.lower(), symbol)]
+    done, _ = wait([f for _, f in futures], timeout=deadline)
+    
+    headlines = []
+    late = []
+    queued = []
+    now = time.monotonic()
+    for name, future in futures:
+        if future in done:
+            headlines.extend(future.result())
+            continue
+        if future.cancel():
+            news_breakers.release(name.lower(), symbol)
+        if name in started:
+            late.append((name, now - started[name]))
+        else:
+            queued.append(name)
+            
+    LATE_PROVIDERS[symbol] = [name for name, _ in late]
+    if late:
+        running = ", ".join(f"{name} (ran {seconds:.1f}s)" for name, seconds in late)
+        print(f"[NEWS] {symbol}: dropped late providers after {deadline}s: {running}")
+    if queued:
+        print(f"[NEWS] {symbol}: news pool busy, never started: {', '.join(queued)}")
+
+    return headlines
+
+def _gather_news(symbol):
+    """
+    Headlines for one symbol (all providers, Yahoo as fallback), capped at 30.
+    """
+    # 1. Fetch News from all providers (in parallel, under one deadline)
+    headlines = _collect_headlines(symbol)
+    
+    # Fallback to yfinance if all else fails
+    if not headlines:
+         ticker = yf.Ticker(symbol)
+         if ticker.news:
+             headlines = [f"[Yahoo] {item.get('title')}" for item in ticker.news[:3]]
+             
+    return headlines[:30] # Increased limit to 30 for massive input
+
+# One model handle for the life of the process
+_model = None
+_model_lock = threading.Lock()
+
+def _get_model():
+    global _model
+    with _model_lock:
+        if _model is None:
+            # Heavy SDK import, deferred until the first Gemini request
+            import google.generativeai as genai
+            genai.configure(api_key=config.GENAI_API_KEY)
+            
+            # Using the latest stable flash model
+            try:
+                 _model = genai.GenerativeModel('gemini-flash-latest')
+            except:
+                 # Fallback
+                 _model = genai.GenerativeModel('gemini-pro')
+        return _model
+
+def _skip_reason(error_msg):
+    if "429" in error_msg or "Quota" in error_msg or "quota" in error_msg:
+         return QUOTA_SKIP_REASON
+    return "Sentiment Check Skipped (Error Fetching News)"
+
+class QuotaExhausted(Exception):
+    pass
+
+def _generate(prompt, **kwargs):
+    """
+    Gemini call under the quota scheduler: waits for a request/token slot, and
+    feeds 429s back so later calls stop early instead of hitting the API again.
+    """
+    if not provider_quota.acquire("gemini", tokens=_estimate_tokens(prompt),
+                                  timeout=config.GEMINI_MAX_WAIT_SECONDS):
+        raise QuotaExhausted("Gemini quota exhausted")
+    try:
+        with stage_slot("llm"), scan_metrics.provider("gemini"):
+            return _get_model().generate_content(prompt, **kwargs)
+    except Exception as e:
+        error_msg = str(e)
+        if _is_quota_error(error_msg):
+            if "PerDay" in error_msg:
+                provider_quota.mark_exhausted("gemini")
+            else:
+                provider_quota.throttle("gemini")
+        raise
 
 def get_market_sentiment(symbol):
     """
@@ -35,57 +197,18 @@ def get_market_sentiment(symbol):
         return 0, "No API Key"
 
     try:
-        # 1. Fetch News from IDX (Official Sources)
-        headlines = idx_fetcher.get_stock_news(symbol, days=7)
-        if headlines is None:
-            headlines = []
-            
-        # 2. Fetch News from Finnhub
-        fh_headlines = finnhub_fetcher.get_company_news(symbol, days=7)
-        if fh_headlines:
-             headlines.extend(fh_headlines)
-            
-        # 3. Fetch News from Polygon
-        poly_headlines = polygon_fetcher.get_company_news(symbol, limit=5)
-        if poly_headlines:
-             headlines.extend(poly_headlines)
-        
-        # 4. Fetch News from MarketAux
-        ma_headlines = marketaux_fetcher.get_company_news(symbol, limit=3)
-        if ma_headlines:
-             headlines.extend(ma_headlines)
-
-        # 5. Fetch News from NewsAPI
-        na_headlines = newsapi_fetcher.get_company_news(symbol, days=7)
-        if na_headlines:
-             headlines.extend(na_headlines)
-
-        # 6. Fetch News from NewsData
-        nd_headlines = newsdata_fetcher.get_company_news(symbol, limit=3)
-        if nd_headlines:
-             headlines.extend(nd_headlines)
-        
-        # Fallback to yfinance if all else fails
-        if not headlines:
-             ticker = yf.Ticker(symbol)
-             if ticker.news:
-                 headlines = [f"[Yahoo] {item.get('title')}" for item in ticker.news[:3]]
-            
+        headlines = _gather_news(symbol)
         if not headlines:
             return 0, "No Headlines Found"
+        
+        # Same headline set as a previous call -> reuse that verdict
+        cached = sentiment_cache.get(symbol, headlines)
+        if cached is not None:
+            return cached
 
-        news_text = "\n".join(headlines[:30]) # Increased limit to 30 for massive input
-
+        news_text = "\n".join(headlines)
         
         # 2. Ask Gemini
-        # Using the latest stable flash model
-        model_name = 'gemini-flash-latest'
-        try:
-             model = genai.GenerativeModel(model_name)
-        except:
-             # Fallback
-             model = genai.GenerativeModel('gemini-pro')
-             
         prompt = f"""
         Analyze the sentiment of the following news headlines for the stock '{symbol}'.
         Headlines:
@@ -103,12 +226,11 @@ def get_market_sentiment(symbol):
         - If no positive/negative news, omit that line.
         """
         
-        response = model.generate_content(prompt)
+        response = _generate(prompt)
         text = response.text.strip()
         
         # Parse Score
         try:
-            import re
             score_match = re.search(r"SCORE:\s*([-]?\d+)", text)
             if score_match:
                 score = int(score_match.group(1))
@@ -128,13 +250,224 @@ def get_market_sentiment(symbol):
         # Clamp score
         score = max(-100, min(100, score))
         
+        sentiment_cache.put(symbol, headlines, score, explanation)
         return score, explanation
 
     except Exception as e:
         error_msg = str(e)
         print(f"[ERROR] Sentiment Analysis Failed: {error_msg}")
+        return 0, _skip_reason(error_msg)
+
+# --- Batched Sentiment ---
+
+BATCH_PROMPT = """
+Analyze the sentiment of the news headlines for each of the following stocks.
+Rules:
+- score: -100 (Bankruptcy/Crash) to +100 (Growth/Dividends). 0 if Neutral.
+- positive / negative: top 1-2 positive and/or top 1-2 negative points derived from that stock's headlines. Empty list if none.
+- Judge every stock only on its own headlines.
+- Return one entry per stock, using the exact symbol given.
+
+{blocks}
+"""
+
+BATCH_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "symbol": {"type": "string"},
+            "score": {"type": "integer"},
+            "positive": {"type": "array", "items": {"type": "string"}},
+            "negative": {"type": "array", "items": {"type": "string"}},
+        },
+        "required": ["symbol", "score"],
+    },
+}
+
+def _estimate_tokens(text):
+    # ~4 characters per token is close enough for packing decisions
+    return len(text) // 4 + 1
+
+def _symbol_block(symbol, headlines):
+    return f"### {symbol}\n" + "\n".join(headlines)
+
+def _pack_batches(news, order):
+    """
+    Greedily packs symbols into prompts that stay under the token and size limits.
+    """
+    batches = []
+    current, current_tokens = [], _estimate_tokens(BATCH_PROMPT)
+    for symbol in order:
+        tokens = _estimate_tokens(_symbol_block(symbol, news[symbol]))
+        if current and (current_tokens + tokens > config.GEMINI_BATCH_TOKEN_LIMIT
+                        or len(current) >= config.GEMINI_BATCH_MAX_SYMBOLS):
+            batches.append(current)
+            current, current_tokens = [], _estimate_tokens(BATCH_PROMPT)
+        current.append(symbol)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+def _is_quota_error(error_msg):
+    """429 / RESOURCE_EXHAUSTED: rate or quota limits, including tokens-per-minute."""
+    msg = error_msg.lower()
+    return ("429" in msg or "resource_exhausted" in msg or "resource exhausted" in msg
+            or "quota" in msg or "rate limit" in msg)
+
+def _is_size_error(error_msg):
+    """
+    Context-length rejections only. Quota errors mention tokens too, but splitting a
+    throttled batch would just send more requests to an API that is refusing them.
+    """
+    if _is_quota_error(error_msg):
+        return False
+    msg = error_msg.lower()
+    if "too large" in msg or "too long" in msg or "context length" in msg:
+        return True
+    return "token" in msg and ("exceed" in msg or "maximum" in msg)
+
+def _analyze_batch(symbols, news):
+    """
+    Sends one structured request for `symbols`. Splits the batch in half and retries
+    when the request is rejected as too large.
+
+    Returns:
+        dict: symbol -> (score, explanation) for every symbol in the response.
+    """
+    prompt = BATCH_PROMPT.format(blocks="\n\n".join(_symbol_block(s, news[s]) for s in symbols))
+    try:
+        response = _generate(
+            prompt,
+            generation_config={
+                "response_mime_type": "application/json",
+                "response_schema": BATCH_SCHEMA,
+            }
+        )
+        entries = json.loads(response.text)
+    except Exception as e:
+        error_msg = str(e)
+        if len(symbols) > 1 and _is_size_error(error_msg):
+            mid = len(symbols) // 2
+            print(f"[SENTIMENT] Batch of {len(symbols)} too large, splitting.")
+            verdicts = _analyze_batch(symbols[:mid], news)
+            verdicts.update(_analyze_batch(symbols[mid:], news))
+            return verdicts
+        raise
+
+    verdicts = {}
+    for entry in entries:
+        symbol = entry.get('symbol')
+        if symbol not in news:
+            continue
+        try:
+            score = max(-100, min(100, int(entry.get('score', 0))))
+        except (TypeError, ValueError):
+            score = 0
+        lines = [f"(+) {p}" for p in entry.get('positive') or []]
+        lines += [f"(-) {n}" for n in entry.get('negative') or []]
+        verdicts[symbol] = (score, "\n".join(lines))
+    return verdicts
+
+def _safe_gather_news(symbol):
+    try:
+        return _gather_news(symbol)
+    except Exception as e:
+        return e
+
+def get_market_sentiment_batch(symbols, priorities=None):
+    """
+    Batch version of get_market_sentiment: gathers news for all symbols, reuses
+    cached verdicts, and packs the rest into as few Gemini requests as the token
+    limit allows (structured JSON output, one entry per symbol).
+
+    Args:
+        symbols (list): Ticker symbols.
+        priorities (dict): Optional symbol -> priority; higher is gathered first and goes
+            into earlier batches, so the best setups get news and Gemini quota first.
+
+    Returns:
+        dict: symbol -> (score, explanation), same values as get_market_sentiment.
+    """
+    if not config.GENAI_API_KEY:
+        print("[WARN] GENAI_API_KEY not set. Skipping sentiment analysis.")
+        return {s: (0, "No API Key") for s in symbols}
+
+    results = {}
+    news = {}
+    # News fan-out in priority order: the daily provider budgets go to the best setups
+    if priorities:
+        symbols = sorted(symbols, key=lambda s: priorities.get(s, 0), reverse=True)
+    
+    with ThreadPoolExecutor(max_workers=max(1, config.STAGE_LIMITS["score"])) as pool:
+        gathered = dict(zip(symbols, pool.map(_safe_gather_news, symbols)))
         
-        if "429" in error_msg or "Quota" in error_msg or "quota" in error_msg:
-             return 0, "Sentiment Check Skipped (API Quota Limit)"
+    for symbol, headlines in gathered.items():
+        if isinstance(headlines, Exception):
+            results[symbol] = (0, _skip_reason(str(headlines)))
+        elif not headlines:
+            results[symbol] = (0, "No Headlines Found")
+        else:
+            cached = sentiment_cache.get(symbol, headlines)
+            if cached is not None:
+                results[symbol] = cached
+            else:
+                news[symbol] = headlines
+                
+    order = list(news)
+    if priorities:
+        order.sort(key=lambda s: priorities.get(s, 0), reverse=True)
         
-        return 0, "Sentiment Check Skipped (Error Fetching News)"
+    for batch in _pack_batches(news, order):
+        try:
+            verdicts = _analyze_batch(batch, news)
+        except Exception as e:
+            error_msg = str(e)
+            print(f"[ERROR] Batch Sentiment Analysis Failed: {error_msg}")
+            for symbol in batch:
+                results[symbol] = (0, _skip_reason(error_msg))
+            continue
+            
+        for symbol in batch:
+            if symbol in verdicts:
+                score, explanation = verdicts[symbol]
+                sentiment_cache.put(symbol, news[symbol], score, explanation)
+                results[symbol] = verdicts[symbol]
+            else:
+                results[symbol] = (0, "News analysis available but formatting failed.")
+                
+    return results
+
+
+if __name__ == "__main__":
+    # Self-check: only context-length errors split a batch, quota errors never do
+    size_errors = [
+        "400 The input token count (1290112) exceeds the maximum number of tokens allowed (1048576).",
+        "400 Request payload size exceeds the limit: 20971520 bytes. Request too large.",
+    ]
+    quota_errors = [
+        "429 Resource has been exhausted (e.g. check quota). Quota exceeded for metric: "
+        "generativelanguage.googleapis.com/generate_content_free_tier_input_token_count, "
+        "limit: 250000. GenerateContentInputTokensPerModelPerMinute exceeds limit.",
+        "429 RESOURCE_EXHAUSTED: tokens per minute limit exceeded",
+        "Gemini quota exhausted",
+    ]
+    for msg in size_errors:
+        assert _is_size_error(msg) and not _is_quota_error(msg), msg
+    for msg in quota_errors:
+        assert _is_quota_error(msg) and not _is_size_error(msg), msg
+
+    calls = []
+    def throttled(prompt, **kwargs):
+        calls.append(prompt)
+        raise Exception(quota_errors[0])
+    _generate = throttled
+    news = {f"S{i}.JK": [f"headline {i}"] for i in range(8)}
+    try:
+        _analyze_batch(list(news), news)
+    except Exception:
+        pass
+    assert len(calls) == 1, f"throttled batch was split into {len(calls)} requests"
+    print("[SENTIMENT] Self-check passed: 429 errors are not treated as batch-size errors.")
+
@@ -0,0 +1,81 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import sys
+
+# Add parent to path for output.metrics
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from output.metrics import scan_metrics
+
+# Durable cache of Gemini sentiment results.
+# Keyed by symbol + a hash of the normalized headline set, so a symbol is only
+# re-analyzed when its news actually changes. Survives restarts (JSON on disk).
+CACHE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "sentiment_cache.json")
+
+def headline_fingerprint(headlines):
+    """
+    Order- and whitespace-insensitive hash of a headline set.
+    """
+    normalized = sorted({" ".join(h.lower().split()) for h in headlines if h})
+    return hashlib.sha1("\n".join(normalized).encode("utf-8")).hexdigest()
+
+class SentimentCache:
+    def __init__(self, path=CACHE_FILE, ttl_minutes=720, max_entries=2000):
+        self.path = path
+        self.ttl_seconds = ttl_minutes * 60
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r') as f:
+                entries = json.load(f)
+        except Exception as e:
+            print(f"[SENTIMENT CACHE] Cache read error: {e}")
+            return {}
+        now = time.time()
+        return {k: v for k, v in entries.items() if now - v['created'] < self.ttl_seconds}
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
+
+    def get(self, symbol, headlines):
+        """
+        Returns the cached (score, explanation) for this exact headline set, or None.
+        """
+        key = f"{symbol}|{headline_fingerprint(headlines)}"
+        with self.lock:
+            entry = self.entries.get(key)
+            now = time.time()
+            if entry is not None and now - entry['created'] >= self.ttl_seconds:
+                del self.entries[key]
+                entry = None
+            scan_metrics.cache("sentiment", hits=int(entry is not None), misses=int(entry is None))
+            if entry is None:
+                return None
+            entry['used'] = now
+            return entry['score'], entry['explanation']
+
+    def put(self, symbol, headlines, score, explanation):
+        key = f"{symbol}|{headline_fingerprint(headlines)}"
+        now = time.time()
+        with self.lock:
+            self.entries[key] = {"score": score, "explanation": explanation, "created": now, "used": now}
+            # Size bound: evict least recently used entries
+            if len(self.entries) > self.max_entries:
+                by_use = sorted(self.entries, key=lambda k: self.entries[k]['used'])
+                for old_key in by_use[:len(self.entries) - self.max_entries]:
+                    del self.entries[old_key]
+            try:
+                self._save()
+            except Exception as e:
+                print(f"[SENTIMENT CACHE] Cache write error: {e}")
@@ -0,0 +1,311 @@
+import math
+from collections import deque
+import numpy as np
+import pandas as pd
+
+# Stateful version of indicators.add_indicators.
+# Every indicator keeps rolling state for the *committed* bars (all but the last one)
+# and evaluates the last, still-forming bar on top of it. Revising the last bar or
+# appending a new one is therefore O(1) per indicator instead of a full recompute.
+
+INDICATOR_COLUMNS = ['MA20', 'MA50', 'RSI', 'VolMA20', 'Support20', 'Resistance20', 'ATR']
+MIN_BARS = 50 # Same warm-up cut-off as add_indicators
+
+
+class RollingMean:
+    """Simple moving average via a running sum over the last window-1 committed values."""
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.total = 0.0
+        self.pending = None
+
+    def evaluate(self, x):
+        self.pending = x
+        if len(self.values) < self.window - 1:
+            return math.nan
+        return (self.total + x) / self.window
+
+    def commit(self):
+        self.values.append(self.pending)
+        self.total += self.pending
+        if len(self.values) > self.window - 1:
+            self.total -= self.values.popleft()
+
+
+class RollingExtreme:
+    """Rolling min/max via a monotonic deque of (position, value) for committed bars."""
+    def __init__(self, window, mode="min"):
+        self.window = window
+        self.better = (lambda a, b: a <= b) if mode == "min" else (lambda a, b: a >= b)
+        self.queue = deque()
+        self.count = 0
+        self.pending = None
+
+    def evaluate(self, x):
+        self.pending = x
+        if self.count < self.window - 1:
+            return math.nan
+        if self.queue and self.better(self.queue[0][1], x):
+            return self.queue[0][1]
+        return x
+
+    def commit(self):
+        x = self.pending
+        while self.queue and self.better(x, self.queue[-1][1]):
+            self.queue.pop()
+        self.queue.append((self.count, x))
+        self.count += 1
+        # Keep only the last window-1 committed positions
+        while self.queue[0][0] <= self.count - self.window:
+            self.queue.popleft()
+
+
+class WilderRSI:
+    """Matches ta.momentum.RSIIndicator: ewm(alpha=1/window, adjust=False, min_periods=window)."""
+    def __init__(self, window=14):
+        self.window = window
+        self.alpha = 1.0 / window
+        self.count = 0
+        self.prev_close = None
+        self.ema_up = 0.0
+        self.ema_down = 0.0
+        self.pending = None
+
+    def evaluate(self, close):
+        if self.prev_close is None:
+            up = down = 0.0 # First diff is NaN, ta maps it to 0
+        else:
+            diff = close - self.prev_close
+            up = diff if diff > 0 else 0.0
+            down = -diff if diff < 0 else 0.0
+
+        if self.count == 0:
+            ema_up, ema_down = up, down
+        else:
+            ema_up = (1 - self.alpha) * self.ema_up + self.alpha * up
+            ema_down = (1 - self.alpha) * self.ema_down + self.alpha * down
+        self.pending = (close, ema_up, ema_down)
+
+        if self.count + 1 < self.window:
+            return math.nan
+        if ema_down == 0:
+            return 100.0
+        return 100 - (100 / (1 + ema_up / ema_down))
+
+    def commit(self):
+        self.prev_close, self.ema_up, self.ema_down = self.pending
+        self.count += 1
+
+
+class WilderATR:
+    """Matches ta.volatility.AverageTrueRange: 0 during warm-up, SMA seed, then Wilder smoothing."""
+    def __init__(self, window=14):
+        self.window = window
+        self.count = 0
+        self.prev_close = None
+        self.tr_sum = 0.0
+        self.atr = 0.0
+        self.pending = None
+
+    def evaluate(self, high, low, close):
+        tr = high - low
+        if self.prev_close is not None:
+            tr = max(tr, abs(high - self.prev_close), abs(low - self.prev_close))
+
+        tr_sum = self.tr_sum + tr if self.count < self.window else self.tr_sum
+        if self.count < self.window - 1:
+            atr = 0.0
+        elif self.count == self.window - 1:
+            atr = tr_sum / self.window
+        else:
+            atr = (self.atr * (self.window - 1) + tr) / self.window
+        self.pending = (close, tr_sum, atr)
+        return atr
+
+    def commit(self):
+        self.prev_close, self.tr_sum, self.atr = self.pending
+        self.count += 1
+
+
+class SymbolIndicatorState:
+    """Rolling state and indicator history for one symbol."""
+    def __init__(self):
+        self.ma20 = RollingMean(20)
+        self.ma50 = RollingMean(50)
+        self.rsi = WilderRSI(14)
+        self.vol_ma20 = RollingMean(20)
+        self.support20 = RollingExtreme(20, "min")
+        self.resistance20 = RollingExtreme(20, "max")
+        self.atr = WilderATR(14)
+
+        self.history = np.empty((256, len(INDICATOR_COLUMNS)))
+        self.length = 0 # Rows in history, including the provisional last bar
+        self.first_ts = None
+        self.last_ts = None
+
+    def revise(self, ts, high, low, close, volume):
+        """(Re-)evaluates the last bar without touching committed state."""
+        row = (
+            self.ma20.evaluate(close),
+            self.ma50.evaluate(close),
+            self.rsi.evaluate(close),
+            self.vol_ma20.evaluate(volume),
+            self.support20.evaluate(low),
+            self.resistance20.evaluate(high),
+            self.atr.evaluate(high, low, close),
+        )
+        if self.length == 0:
+            self.first_ts = ts
+        if self.last_ts is None:
+            self.length += 1
+            if self.length > len(self.history):
+                self.history = np.concatenate([self.history, np.empty_like(self.history)])
+        self.history[self.length - 1] = row
+        self.last_ts = ts
+
+    def append(self, ts, high, low, close, volume):
+        """Commits the current last bar and evaluates a new one."""
+        if self.last_ts is not None:
+            for ind in (self.ma20, self.ma50, self.rsi, self.vol_ma20,
+                        self.support20, self.resistance20, self.atr):
+                ind.commit()
+            self.last_ts = None
+        self.revise(ts, high, low, close, volume)
+
+
+class IndicatorEngine:
+    """
+    Per-symbol streaming replacement for add_indicators.
+    Once a symbol is warm, a scan only feeds the new or revised last bar(s).
+    """
+    def __init__(self):
+        self.states = {}
+
+    def _rebuild(self, df):
+        state = SymbolIndicatorState()
+        for ts, high, low, close, volume in zip(df.index, df['High'].to_numpy(), df['Low'].to_numpy(),
+                                                df['Close'].to_numpy(), df['Volume'].to_numpy()):
+            state.append(ts, high, low, close, volume)
+        return state
+
+    def _advance(self, state, df):
+        """
+        Feeds the bars of `df` that the state has not seen yet.
+        Returns False when df does not continue the stored history bar for bar (gap,
+        rewrite, a window that starts on a different day), in which case the caller
+        rebuilds: RSI and ATR depend on every bar since the first one, so a state with
+        more or less leading history than df would drift from add_indicators(df).
+        """
+        if len(df) == 0 or df.index[0] != state.first_ts:
+            return False
+        try:
+            pos = df.index.get_loc(state.last_ts)
+        except KeyError:
+            return False
+        # Same bars up to the stored last bar
+        if not isinstance(pos, int) or pos + 1 != state.length:
+            return False
+
+        highs = df['High'].to_numpy()
+        lows = df['Low'].to_numpy()
+        closes = df['Close'].to_numpy()
+        volumes = df['Volume'].to_numpy()
+
+        # A rewritten close before the last bar (split / dividend adjustment) changes the history
+        if pos > 0 and closes[pos - 1] != state.rsi.prev_close:
+            return False
+
+        # The stored last bar may have been revised since we saw it (e.g. final close)
+        state.revise(df.index[pos], highs[pos], lows[pos], closes[pos], volumes[pos])
+        for i in range(pos + 1, len(df)):
+            state.append(df.index[i], highs[i], lows[i], closes[i], volumes[i])
+        return True
+
+    def update(self, symbol, df):
+        """
+        Adds the add_indicators columns to `df` using the symbol's rolling state.
+
+        Args:
+            symbol (str): Ticker symbol, used as the state key.
+            df (pd.DataFrame): OHLCV frame as returned by fetch_data.
+
+        Returns:
+            pd.DataFrame: df with MA20, MA50, RSI, VolMA20, Support20, Resistance20, ATR.
+        """
+        if df is None or len(df) < MIN_BARS:
+            return df
+
+        state = self.states.get(symbol)
+        if state is None or not self._advance(state, df):
+            state = self._rebuild(df)
+            self.states[symbol] = state
+
+        values = state.history[state.length - len(df):state.length]
+        for i, col in enumerate(INDICATOR_COLUMNS):
+            df[col] = values[:, i]
+        return df
+
+    def reset(self, symbol=None):
+        if symbol is None:
+            self.states.clear()
+        else:
+            self.states.pop(symbol, None)
+
+
+if __name__ == "__main__":
+    # Parity check against add_indicators on a synthetic random walk,
+    # including intraday revisions of the last bar and daily appends.
+    from indicators.indicators import add_indicators
+
+    rng = np.random.default_rng(7)
+    n = 300
+    close = 1000 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    spread = np.abs(rng.normal(0, 0.01, n)) * close
+    bars = pd.DataFrame({
+        'Open': close + rng.normal(0, 0.005, n) * close,
+        'High': close + spread,
+        'Low': close - spread,
+        'Close': close,
+        'Volume': rng.integers(1_000, 5_000_000, n).astype(float),
+    }, index=pd.bdate_range("2024-01-01", periods=n))
+
+    engine = IndicatorEngine()
+    worst = 0.0
+    for end in range(60, n + 1):
+        for revision in range(3):
+            window = bars.iloc[:end].copy()
+            if revision < 2:
+                window.iloc[-1, window.columns.get_loc('Close')] *= 1 + 0.01 * (revision - 1)
+            expected = add_indicators(window.copy())[INDICATOR_COLUMNS]
+            actual = engine.update("TEST.JK", window)[INDICATOR_COLUMNS]
+            diff = np.nanmax(np.abs(expected.to_numpy() - actual.to_numpy()) / (1 + np.abs(expected.to_numpy())))
+            assert np.array_equal(np.isnan(expected.to_numpy()), np.isnan(actual.to_numpy())), f"NaN mismatch at {end}"
+            worst = max(worst, diff)
+
+    assert worst < 1e-9, f"Parity failed: max rel diff {worst}"
+    print(f"[STREAMING] Parity OK over {n - 59} days x 3 revisions (max rel diff {worst:.2e})")
+
+    def check(label, window):
+        expected = add_indicators(window.copy())[INDICATOR_COLUMNS].to_numpy()
+        actual = engine.update("TEST.JK", window)[INDICATOR_COLUMNS].to_numpy()
+        assert np.array_equal(np.isnan(expected), np.isnan(actual)), f"NaN mismatch ({label})"
+        diff = np.nanmax(np.abs(expected - actual) / (1 + np.abs(expected)))
+        assert diff < 1e-9, f"Parity failed ({label}): max rel diff {diff}"
+
+    # Sliding 1y-style window: the oldest bar drops off as a new one arrives
+    engine.reset()
+    size = 250
+    for start in range(0, n - size + 1):
+        for revision in range(2):
+            window = bars.iloc[start:start + size].copy()
+            if revision == 0:
+                window.iloc[-1, window.columns.get_loc('Close')] *= 0.99
+            check(f"sliding window at {start}", window)
+
+    # Adjusted history: an earlier close is rewritten while the window stays put
+    window = bars.iloc[:200].copy()
+    check("before adjustment", window)
+    window.iloc[:-1, window.columns.get_loc('Close')] *= 0.95
+    check("adjusted history", window)
+    print(f"[STREAMING] Parity OK over {n - size + 1} sliding {size}-bar windows and a rewritten history")
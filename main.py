@@ -1,36 +1,43 @@
-
 import time
-import pandas as pd
+import threading
 import datetime
-import yfinance as yf
 import sys
 
-print("[DEBUG] Loading main.py v1.2 ...")
-
-
 import config
-from data.market_data import fetch_data, get_latest_news
-from indicators.indicators import add_indicators
+from indicators.streaming import IndicatorEngine
 from strategy.score_strategy import ConfluenceStrategy
 from output.google_sheet import update_sheet
-from output.telegram_alert import send_telegram_alert
+from output.telegram_alert import send_telegram_alert, alert_dispatcher
+from scan_pipeline import ScanPipeline
+from scan_scheduler import ScanScheduler
+from data.symbol_metadata import symbol_metadata
+from data.http_sessions import format_connection_stats
+from data.rate_limiter import provider_quota
+from data.circuit_breaker import news_breakers
+from data.liquidity_index import liquidity_index, LiquidityIndex
+from output.metrics import scan_metrics
 
 # Init Strategy
 strategy_engine = ConfluenceStrategy()
+# Rolling indicator state, kept across scans in live mode
+indicator_engine = IndicatorEngine()
+scan_pipeline = ScanPipeline(strategy_engine, indicator_engine)
 
 def get_sector(symbol):
-    try:
-        t = yf.Ticker(symbol)
-        return t.info.get('sector', 'Unknown')
-    except:
-        return 'Unknown'
+    # Local metadata index, no network call per result
+    return symbol_metadata.sector(symbol)
 
 # Track sent alerts to avoid spamming during live scan
 SENT_ALERTS = set()
 LAST_RESET_DATE = None
 
+# Offline replay (--replay): a data.replay.ReplaySource whose clock replaces the wall clock
+REPLAY = None
+
 def get_wib_time():
     """Returns current time in WIB (UTC+7)"""
+    if REPLAY is not None:
+        return REPLAY.clock.now()
     utc_now = datetime.datetime.now(datetime.timezone.utc)
     wib_tz = datetime.timezone(datetime.timedelta(hours=7))
     return utc_now.astimezone(wib_tz)
@@ -54,64 +61,174 @@ def is_market_open():
         
     return False, "Outside Trading Hours (08:00-16:00 WIB)"
 
-def run_scan(live_mode=True):
+def sleep(seconds):
+    """time.sleep, or a step of the simulated clock in replay mode."""
+    if REPLAY is not None:
+        REPLAY.clock.sleep(seconds)
+    else:
+        time.sleep(seconds)
+
+def enable_replay(frames, day=None, speed=0):
+    """
+    Switches the bot to an offline replay of `frames` (symbol -> daily OHLCV):
+    the scan universe becomes the replayed symbols, bars come from a ReplaySource,
+    the clock starts at the open of `day` (default: the last session in the data)
+    and no request leaves the process (no yfinance, news, Gemini, Telegram or Sheets).
+    """
+    global REPLAY, liquidity_index
+    from data.replay import ReplaySource, SimClock, session_start
+
+    source = ReplaySource(frames, clock=None)
+    day = day or source.last_day()
+    source.clock = SimClock(session_start(day), speed=speed)
+
+    config.STOCK_UNIVERSE = source.symbols
+    scan_pipeline.source = source
+    strategy_engine.set_offline()
+    # In-memory index from the bars before the replayed day (the live cache is left alone)
+    liquidity_index = LiquidityIndex(path=None)
+    liquidity_index.rebuild(source.symbols, frames=source.history(day))
+    REPLAY = source
+    print(f"[REPLAY] {len(source.symbols)} symbols, session {day} (speed: {speed or 'max'})")
+    return source
+
+def run_scan(live_mode=True, scheduler=None):
     """
     Runs the scan logic.
+    With a ScanScheduler only the symbols due for a rescan are scanned (tier by
+    tier, hottest first); the sheet still gets the latest result of every symbol.
     """
     scan_time = get_wib_time()
+    scan_start = time.perf_counter()
+    scan_metrics.reset()
     print(f"\n[SCAN] Executing at {scan_time.strftime('%H:%M:%S')} (Live Mode: {live_mode})")
     
-    results = []
+    today_str = scan_time.strftime('%Y-%m-%d')
     
-    # 1. Iterate Universe
-    for symbol in config.STOCK_UNIVERSE:
-        # 2. Fetch Data
-        df = fetch_data(symbol, period=config.HISTORY_PERIOD, interval=config.TIMEFRAME)
-        if df is None:
-            continue
-            
-        # 3. Add Indicators
-        df = add_indicators(df)
-        
+    def should_alert(result):
+        alert_key = f"{result['symbol']}_{today_str}"
+        if live_mode and alert_key in SENT_ALERTS:
+            return False
+        print(f"!!! SIGNAL FOUND: {result['symbol']} (Score: {result['score']}) !!!")
+        return True
+    
+    # Replays keep alerts in memory instead of sending them
+    deliver = send_telegram_alert if REPLAY is None else REPLAY.record_alert
+    
+    def send_alert(result):
+        # Only alerts that were actually queued count as sent for today
+        queued = deliver(result)
+        if queued and live_mode:
+            SENT_ALERTS.add(f"{result['symbol']}_{today_str}")
+        return queued
+    
+    # 0. Skip liquidity tiers that can't clear the flow filters
+    with scan_metrics.stage("liquidity"):
+        universe = liquidity_index.filter(config.STOCK_UNIVERSE)
+    stale = "" if liquidity_index.built == datetime.date.today().isoformat() else f", index from {liquidity_index.built}"
+    print(f"[LIQUIDITY] Scanning {len(universe)}/{len(config.STOCK_UNIVERSE)} symbols "
+          f"(tiers {', '.join(config.LIQUIDITY_SCAN_TIERS)}{stale})")
+    
+    # 1-4. Fetch -> Indicators -> Strategy Check -> Telegram Alert (pipelined)
+    # News is already fetched inside calculate_score if needed
+    # Alerts are only queued here; the dispatcher thread delivers them
+    if scheduler is None:
+        results, failures = scan_pipeline.run(
+            universe,
+            should_alert=should_alert,
+            send_alert=send_alert,
+            live_quotes=live_mode
+        )
+    else:
+        failures = {}
+        for tier, symbols in scheduler.due(universe, scan_time).items():
+            tier_start = time.perf_counter()
+            tier_results, tier_failures = scan_pipeline.run(
+                symbols,
+                should_alert=should_alert,
+                send_alert=send_alert,
+                live_quotes=live_mode
+            )
+            failures.update(tier_failures)
+            scheduler.record(tier, symbols, tier_results, scan_pipeline.latest_bars, scan_time,
+                             time.perf_counter() - tier_start)
+        results = scheduler.results(universe)
+        print(f"[SCHEDULER] {scheduler.summary()}")
+    
+    for result in results:
+        result['sector'] = get_sector(result['symbol'])
+    
+    # 5. Update Google Sheet
+    if REPLAY is None:
+        with scan_metrics.stage("sheet"):
+            update_sheet(results)
+        print(f"[COMPLETE] Processed {len(results)} stocks ({len(failures)} fetch failures). Sheet updated.")
+    else:
+        REPLAY.record_scan(time.perf_counter() - scan_start, results)
+        print(f"[COMPLETE] Processed {len(results)} stocks ({len(failures)} fetch failures) "
+              f"in {time.perf_counter() - scan_start:.2f}s. Sheet skipped (replay).")
+    print(f"[HTTP] Connection reuse: {format_connection_stats()}")
+    print(f"[QUOTA] Remaining today: {provider_quota.summary()}")
+    print(f"[BREAKERS] {news_breakers.summary()}")
+    
+    # 6. Per-stage timings, cache hit rates and funnel vs the 60s budget
+    snapshot = scan_metrics.snapshot(time.perf_counter() - scan_start)
+    print(f"[METRICS] {scan_metrics.summary(snapshot)}")
+    print(f"[FUNNEL] {scan_metrics.funnel_line(snapshot)}")
+    print(f"[DECISIONS] {scan_metrics.decisions_line(snapshot)}")
+    if REPLAY is None:
+        scan_metrics.export(snapshot)
 
-        # 4. Strategy Check
-        result = strategy_engine.calculate_score(df, symbol)
-        result['sector'] = "IDX Stock"
-        
-        results.append(result)
-        
-        # 5. Telegram Alert
-        if result['valid']:
-             today_str = scan_time.strftime('%Y-%m-%d')
-             alert_key = f"{symbol}_{today_str}"
-             
-             if live_mode and alert_key in SENT_ALERTS:
-                 continue
-                 
-             print(f"!!! SIGNAL FOUND: {symbol} (Score: {result['score']}) !!!")
-             # News is already fetched inside calculate_score if needed
-             send_telegram_alert(result)
-             
-             if live_mode:
-                 SENT_ALERTS.add(alert_key)
+def profile_scans(iterations=1, out_dir="profiles", interval=0.005, top=15):
+    """
+    Runs `iterations` scans under the sampling profiler (scan_profiler.py): one full
+    scan, or several live-loop iterations a minute apart (the waits are not profiled).
+    Writes a call tree, collapsed stacks and the hottest own / third-party functions.
+    """
+    from scan_profiler import SamplingProfiler
+    profiler = SamplingProfiler(interval=interval)
+    scheduler = ScanScheduler() if iterations > 1 else None
     
-    # 6. Update Google Sheet
-    update_sheet(results)
-    print(f"[COMPLETE] Processed {len(results)} stocks. Sheet updated.")
+    for i in range(iterations):
+        if i:
+            sleep(60)
+        with profiler:
+            run_scan(live_mode=True, scheduler=scheduler)
+    
+    print(f"\n[PROFILE] {iterations} scan(s), {profiler.seconds:.1f}s profiled")
+    print(profiler.format_hottest(top), end="")
+    for path in profiler.write_reports(out_dir, top=top):
+        print(f"[PROFILE] Wrote {path}")
+
+def prepare_session():
+    """
+    Daily warm-up, run before the market-open wait: rebuilds the liquidity index
+    (one bulk download of the universe, which also brings the bar store up to date
+    for the first scan) and refreshes fundamentals for the symbols the scans will
+    actually see (the liquidity-filtered universe).
+    """
+    try:
+        liquidity_index.ensure_fresh(config.STOCK_UNIVERSE)
+        universe = liquidity_index.filter(config.STOCK_UNIVERSE)
+        strategy_engine.fundamentals.prefetch(universe)
+    except Exception as e:
+        print(f"[FUNDAMENTALS] Prefetch failed: {e}")
 
 def start_bot(duration_minutes=None):
     global LAST_RESET_DATE
     print("--- IDX Swing Trading Bot Started ---")
-    print("Schedule: Daily 08:00 - 16:00 WIB (Every 1 min)")
+    print("Schedule: Daily 08:00 - 16:00 WIB (Every 1 min, cold symbols every 15-30 min)")
     if duration_minutes:
         print(f"Mode: One-time session for {duration_minutes} minutes.")
     
-    start_time = datetime.datetime.now()
+    start_time = get_wib_time()
+    # Per-symbol rescan cadence, kept for the whole session
+    scheduler = ScanScheduler()
     
     while True:
         # Check duration limit (for GH Actions)
         if duration_minutes:
-            elapsed = (datetime.datetime.now() - start_time).total_seconds() / 60
+            elapsed = (get_wib_time() - start_time).total_seconds() / 60
             if elapsed >= duration_minutes:
                 print(f"[STOP] Duration limit of {duration_minutes}m reached. Exiting session.")
                 break
@@ -124,15 +241,21 @@ def start_bot(duration_minutes=None):
             SENT_ALERTS.clear()
             LAST_RESET_DATE = now.date()
             
+            if is_market_open()[0]:
+                # Started mid-session: don't hold up the scans
+                threading.Thread(target=prepare_session, name="prepare-session", daemon=True).start()
+            else:
+                prepare_session()
+            
         is_open, status = is_market_open()
         
         if is_open:
             try:
-                run_scan(live_mode=True)
+                run_scan(live_mode=True, scheduler=scheduler)
             except Exception as e:
                 print(f"[ERROR] Scan failed: {e}")
             
-            time.sleep(60)
+            sleep(60)
             
         else:
             print(f"[WAITING] {status}. Time: {now.strftime('%H:%M:%S')}", end='\r')
@@ -141,7 +264,7 @@ def start_bot(duration_minutes=None):
             if duration_minutes:
                  print("\n[STOP] Market is closed and duration limit is set. Exiting to save resources.")
                  break
-            time.sleep(60)
+            sleep(60)
 
 if __name__ == "__main__":
     import argparse
@@ -149,16 +272,55 @@ if __name__ == "__main__":
     parser.add_argument("--run-now", action="store_true", help="Run a single scan immediately")
     parser.add_argument("--live", action="store_true", help="Start live market monitoring (infinite loop)")
     parser.add_argument("--duration", type=int, help="Run live monitor for X minutes then exit (for Cron/CI)")
+    parser.add_argument("--replay", action="store_true", help="Replay a trading session offline from the bar store")
+    parser.add_argument("--replay-date", type=datetime.date.fromisoformat, help="Session to replay (default: last stored)")
+    parser.add_argument("--synthetic", type=int, metavar="N", help="Replay N random-walk symbols instead of stored bars")
+    parser.add_argument("--speed", type=float, default=0, help="Replay speed vs real time (default 0: don't wait)")
+    parser.add_argument("--profile", type=int, nargs="?", const=1, metavar="N",
+                        help="Profile one scan (or N live iterations) and write reports to --profile-dir")
+    parser.add_argument("--profile-dir", default="profiles", help="Where --profile writes its reports")
+    parser.add_argument("--profile-interval", type=float, default=5, help="Sampling interval in ms")
+    parser.add_argument("--top", type=int, default=15, help="Functions per list in the --profile summary")
     args = parser.parse_args()
 
     try:
-        if args.run_now:
+        if args.replay:
+            if args.synthetic:
+                from strategy.backtest import synthetic_frames
+                frames = synthetic_frames(args.synthetic, 300)
+            else:
+                from data.market_data import bar_store
+                # Whatever the store holds; resolving the live universe would need the network
+                frames = {s: bar_store.load(s, config.TIMEFRAME) for s in bar_store.symbols(config.TIMEFRAME)}
+                if not frames:
+                    raise SystemExit("No stored bars. Run a scan first or use --replay --synthetic N.")
+            replay = enable_replay(frames, day=args.replay_date, speed=args.speed)
+            if args.profile:
+                # Mid-session, so today's bar is partly formed as in a live scan
+                replay.clock.sleep(4 * 3600)
+                profile_scans(args.profile, args.profile_dir, args.profile_interval / 1000, args.top)
+            else:
+                # One session: the loop exits once the market closes
+                start_bot(duration_minutes=args.duration or 24 * 60)
+            print(f"[REPLAY] {replay.summary()}")
+        elif args.profile:
+            liquidity_index.ensure_fresh(config.STOCK_UNIVERSE)
+            profile_scans(args.profile, args.profile_dir, args.profile_interval / 1000, args.top)
+        elif args.run_now:
+            liquidity_index.ensure_fresh(config.STOCK_UNIVERSE)
             run_scan(live_mode=True)
         elif args.duration:
             start_bot(duration_minutes=args.duration)
         else:
             # Default to infinite live monitor if no args or --live
             start_bot()
+        
+        # Deliver queued alerts before the process exits
+        if not alert_dispatcher.flush(timeout=120):
+            print(f"[TELEGRAM] {alert_dispatcher.pending()} alert(s) still queued after 120s, not delivered")
+        if alert_dispatcher.undelivered:
+            print(f"[TELEGRAM] {len(alert_dispatcher.undelivered)} alert(s) could not be delivered: "
+                  f"{', '.join(alert_dispatcher.undelivered)}")
             
     except KeyboardInterrupt:
         print("\n[STOP] Bot stopped by user.")
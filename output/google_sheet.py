@@ -1,5 +1,3 @@
-import gspread
-from google.oauth2.service_account import Credentials
 import pandas as pd
 import sys
 import os
@@ -7,78 +5,167 @@ import os
 # Add parent to path for config
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
+from output.metrics import scan_metrics
 
 SCOPES = [
     "https://www.googleapis.com/auth/spreadsheets",
     "https://www.googleapis.com/auth/drive"
 ]
 
-def update_sheet(data_list):
+def build_sheet_values(data_list):
     """
-    Updates the Google Sheet with the latest scanning results.
+    Converts strategy results into the sheet grid (header row + one row per result).
+    """
+    # Prepare DataFrame
+    df = pd.DataFrame(data_list)
     
-    Args:
-        data_list (list of dict): List of result dictionaries from strategy.
+    # Select and Rename Columns to match requirements
+    # Required: Date, Stock Code, Sector, Last Price, MA20, MA50, RSI, Vol, VolAvg, Trend, Setup, Buy, SL, TP, Risk, Reward, Decision
     
-    Returns:
-        bool: True if successful
+    # Map our keys to headers
+    # Note: 'sector' might be missing if we didn't fetch it effectively. We'll handle that in main loop.
+    
+
+
+    # Curated Columns (Reduced) based on user feedback "Too much data"
+    display_columns = [
+        "date", "symbol", "decision", "reasons", "buy_area", "target", "news_summary"
+    ]
+    
+
+    # Ensure all columns exist
+    for col in display_columns:
+        if col not in df.columns:
+            df[col] = "-"
+    
+    # KEY FIX: Replace NaN/Inf with 0 or string to prevent JSON errors
+    df_final = df[display_columns].fillna(0).replace([float('inf'), float('-inf')], 0)
+    
+    # Rename for Sheet Headers
+    headers = [
+        "Date", "Stock", "Decision", "Analysis (Short)", "Buy Zone", "Target", "AI Sentiment"
+    ]
+    
+    # Prepare list of lists
+    return [headers] + df_final.values.tolist()
+
+def _a1(row, col):
+    """1-based (row, col) -> A1 notation, e.g. (3, 28) -> 'AB3'."""
+    letters = ""
+    while col:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(65 + rem) + letters
+    return f"{letters}{row}"
+
+def diff_ranges(old_values, new_values):
     """
-    if not data_list:
-        print("No data to update to Google Sheet.")
-        return False
-
-    try:
-        # Check if credentials exist
-        if not os.path.exists(config.GOOGLE_SHEET_JSON_KEYFILE):
-            print(f"Error: {config.GOOGLE_SHEET_JSON_KEYFILE} not found. Cannot update Sheet.")
-            return False
+    Changed cells between two same-shaped grids, as A1 ranges of contiguous
+    changed cells per row: [{'range': 'B3:D3', 'values': [[...]]}, ...]
+    """
+    ranges = []
+    for r, (old_row, new_row) in enumerate(zip(old_values, new_values)):
+        c = 0
+        while c < len(new_row):
+            if old_row[c] == new_row[c]:
+                c += 1
+                continue
+            start = c
+            while c < len(new_row) and old_row[c] != new_row[c]:
+                c += 1
+            ranges.append({
+                "range": f"{_a1(r + 1, start + 1)}:{_a1(r + 1, c)}",
+                "values": [new_row[start:c]]
+            })
+    return ranges
 
-        creds = Credentials.from_service_account_file(config.GOOGLE_SHEET_JSON_KEYFILE, scopes=SCOPES)
-        client = gspread.authorize(creds)
-        
-        # Open by ID
-        sheet = client.open_by_key(config.GOOGLE_SHEET_ID).sheet1 # Assumes first sheet
-        
-        # Prepare DataFrame
-        df = pd.DataFrame(data_list)
-        
-        # Select and Rename Columns to match requirements
-        # Required: Date, Stock Code, Sector, Last Price, MA20, MA50, RSI, Vol, VolAvg, Trend, Setup, Buy, SL, TP, Risk, Reward, Decision
+class SheetPublisher:
+    """
+    Long-lived Sheets client. Authorizes once, remembers the last published grid
+    and only sends changed cells (one batch update per scan). The sheet is fully
+    rewritten only on the first publish or when the grid changes shape.
+    """
+    def __init__(self):
+        self.sheet = None
+        self.last_values = None
+
+    def _connect(self):
+        if self.sheet is None:
+            # Google client libraries are only loaded when we actually publish
+            import gspread
+            from google.oauth2.service_account import Credentials
+            
+            with scan_metrics.provider("sheets"):
+                creds = Credentials.from_service_account_file(config.GOOGLE_SHEET_JSON_KEYFILE, scopes=SCOPES)
+                client = gspread.authorize(creds)
+                
+                # Open by ID
+                self.sheet = client.open_by_key(config.GOOGLE_SHEET_ID).sheet1 # Assumes first sheet
+        return self.sheet
+
+    def publish(self, data_list):
+        """
+        Updates the Google Sheet with the latest scanning results.
         
-        # Map our keys to headers
-        # Note: 'sector' might be missing if we didn't fetch it effectively. We'll handle that in main loop.
+        Args:
+            data_list (list of dict): List of result dictionaries from strategy.
         
+        Returns:
+            bool: True if successful
+        """
+        if not data_list:
+            print("No data to update to Google Sheet.")
+            return False
 
+        try:
+            # Check if credentials exist
+            if not os.path.exists(config.GOOGLE_SHEET_JSON_KEYFILE):
+                print(f"Error: {config.GOOGLE_SHEET_JSON_KEYFILE} not found. Cannot update Sheet.")
+                return False
 
-        # Curated Columns (Reduced) based on user feedback "Too much data"
-        display_columns = [
-            "date", "symbol", "decision", "reasons", "buy_area", "target", "news_summary"
-        ]
-        
+            sheet = self._connect()
+            values = build_sheet_values(data_list)
+            
+            same_shape = (
+                self.last_values is not None
+                and len(values) == len(self.last_values)
+                and all(len(a) == len(b) for a, b in zip(values, self.last_values))
+            )
+            
+            if same_shape:
+                ranges = diff_ranges(self.last_values, values)
+                if not ranges:
+                    print("Google Sheet unchanged.")
+                    return True
+                with scan_metrics.provider("sheets"):
+                    sheet.batch_update(ranges)
+                print(f"Google Sheet updated ({len(ranges)} changed ranges).")
+            else:
+                # Clear and Update
+                with scan_metrics.provider("sheets"):
+                    sheet.clear()
+                    sheet.update(range_name='A1', values=values)
+                print("Google Sheet updated successfully.")
+                
+            self.last_values = values
+            return True
 
-        # Ensure all columns exist
-        for col in display_columns:
-            if col not in df.columns:
-                df[col] = "-"
-        
-        # KEY FIX: Replace NaN/Inf with 0 or string to prevent JSON errors
-        df_final = df[display_columns].fillna(0).replace([float('inf'), float('-inf')], 0)
-        
-        # Rename for Sheet Headers
-        headers = [
-            "Date", "Stock", "Decision", "Analysis (Short)", "Buy Zone", "Target", "AI Sentiment"
-        ]
-        
-        # Prepare list of lists
-        values = [headers] + df_final.values.tolist()
-        
-        # Clear and Update
-        sheet.clear()
-        sheet.update(range_name='A1', values=values)
-        
-        print("Google Sheet updated successfully.")
-        return True
+        except Exception as e:
+            print(f"Error updating Google Sheet: {e}")
+            # Sheet state is unknown now: reconnect and rewrite fully next time
+            self.sheet = None
+            self.last_values = None
+            return False
 
-    except Exception as e:
-        print(f"Error updating Google Sheet: {e}")
-        return False
+publisher = SheetPublisher()
+
+def update_sheet(data_list):
+    """
+    Updates the Google Sheet with the latest scanning results.
+    
+    Args:
+        data_list (list of dict): List of result dictionaries from strategy.
+    
+    Returns:
+        bool: True if successful
+    """
+    return publisher.publish(data_list)
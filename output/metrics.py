@@ -0,0 +1,221 @@
+import os
+import sys
+import json
+import time
+import datetime
+import threading
+from contextlib import contextmanager
+
+# Add parent to path for config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+# Per-scan instrumentation.
+# Modules on the scan path report into the shared `scan_metrics`: time per pipeline
+# stage and per external provider (yfinance, .info, news, Gemini, Telegram, Sheets),
+# cache hits/misses, the symbol funnel and the decision counts. main.run_scan resets it
+# before a scan and exports it afterwards as one JSON line plus a Prometheus textfile.
+# Calls made off the scan path (Telegram dispatcher, fundamentals refresh/prefetch) go
+# to a separate background table that spans scans and stays out of the budget line.
+
+PROM_PREFIX = "tradestock"
+
+# Monotone funnel steps, in display order
+FUNNEL_STEPS = ["universe", "fetched", "sentiment_checked", "alerted"]
+# Decisions as they come out of the pipeline (a histogram, not funnel steps)
+DECISIONS = ["NO DATA", "BEARISH_SKIP", "WEAK_TECH", "NO TRADE", "BIG ACCUM FOCUS", "WATCHLIST", "STRONG BUY"]
+
+def _timer():
+    return {"seconds": 0.0, "calls": 0, "errors": 0, "max_seconds": 0.0, "first": None, "last": None}
+
+class ScanMetrics:
+    """
+    Thread-safe counters for one scan. Stages run concurrently (fetch chunks,
+    scoring workers), so each timer keeps both the summed call time ("seconds")
+    and the wall-clock span from its first start to its last end ("wall_seconds").
+    """
+    def __init__(self, jsonl_path=None, textfile_path=None, budget_seconds=None):
+        self.jsonl_path = jsonl_path or config.METRICS_JSONL_FILE
+        self.textfile_path = textfile_path or config.METRICS_TEXTFILE
+        self.budget_seconds = budget_seconds or config.SCAN_BUDGET_SECONDS
+        self.lock = threading.Lock()
+        self.background = {} # provider -> timer, since process start
+        self.generation = 0
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            # Calls still in flight from the previous scan are dropped when they end
+            self.generation += 1
+            self.stages = {}
+            self.providers = {}
+            self.caches = {}
+            self.funnel = {}
+            self.started = time.perf_counter()
+
+    def _record(self, table, name, start, end, failed, generation):
+        with self.lock:
+            if table is not self.background and generation != self.generation:
+                return
+            timer = table.setdefault(name, _timer())
+            timer["seconds"] += end - start
+            timer["calls"] += 1
+            timer["errors"] += 1 if failed else 0
+            timer["max_seconds"] = max(timer["max_seconds"], end - start)
+            timer["first"] = start if timer["first"] is None else min(timer["first"], start)
+            timer["last"] = end if timer["last"] is None else max(timer["last"], end)
+
+    @contextmanager
+    def _timed(self, table_name, name):
+        with self.lock:
+            table = getattr(self, table_name)
+            generation = self.generation
+        start = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            self._record(table, name, start, time.perf_counter(), failed, generation)
+
+    def stage(self, name):
+        """`with scan_metrics.stage("fetch"): ...` times one pass of a scan stage."""
+        return self._timed("stages", name)
+
+    def provider(self, name, background=False):
+        """
+        `with scan_metrics.provider("gemini"): ...` times one external call; exceptions
+        count as errors. background=True for calls made outside the scan (own table).
+        """
+        return self._timed("background" if background else "providers", name)
+
+    def cache(self, name, hits=0, misses=0):
+        with self.lock:
+            counts = self.caches.setdefault(name, {"hits": 0, "misses": 0})
+            counts["hits"] += hits
+            counts["misses"] += misses
+
+    def count(self, step, n=1):
+        """Adds `n` symbols to a funnel step or decision (see FUNNEL_STEPS, DECISIONS)."""
+        with self.lock:
+            self.funnel[step] = self.funnel.get(step, 0) + n
+
+    def snapshot(self, scan_seconds=None):
+        """The scan's metrics as a JSON-ready dict."""
+        if scan_seconds is None:
+            scan_seconds = time.perf_counter() - self.started
+
+        def timers(table):
+            return {
+                name: {
+                    "seconds": round(t["seconds"], 4),
+                    "wall_seconds": round(t["last"] - t["first"], 4),
+                    "calls": t["calls"],
+                    "errors": t["errors"],
+                    "max_seconds": round(t["max_seconds"], 4),
+                }
+                for name, t in sorted(table.items())
+            }
+
+        with self.lock:
+            order = {decision: i for i, decision in enumerate(DECISIONS)}
+            return {
+                "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+                "scan_seconds": round(scan_seconds, 3),
+                "budget_seconds": self.budget_seconds,
+                "over_budget": scan_seconds > self.budget_seconds,
+                "stages": timers(self.stages),
+                "providers": timers(self.providers),
+                "caches": {name: dict(c) for name, c in sorted(self.caches.items())},
+                "funnel": {step: self.funnel.get(step, 0) for step in FUNNEL_STEPS},
+                "decisions": dict(sorted(((d, n) for d, n in self.funnel.items() if d not in FUNNEL_STEPS),
+                                         key=lambda kv: order.get(kv[0], len(order)))),
+                "background": timers(self.background),
+            }
+
+    def summary(self, snapshot):
+        """
+        One line for the scan log, e.g.
+        '41.2s of 60s budget | slowest: gemini 18.3s (4 calls), fetch 9.1s | sentiment cache 12/20 hits'.
+        """
+        parts = [f"{snapshot['scan_seconds']:.1f}s of {snapshot['budget_seconds']}s budget"
+                 + (" (OVER)" if snapshot["over_budget"] else "")]
+        # Summed call time: stages interleave across chunks, so their wall spans overlap
+        spans = [(f"{name} {t['seconds']:.1f}s", t["seconds"]) for name, t in snapshot["stages"].items()]
+        spans += [(f"{name} {t['seconds']:.1f}s ({t['calls']} calls"
+                   + (f", {t['errors']} errors)" if t["errors"] else ")"), t["seconds"])
+                  for name, t in snapshot["providers"].items()]
+        slowest = sorted(spans, key=lambda s: -s[1])[:3]
+        if slowest:
+            parts.append("slowest: " + ", ".join(label for label, _ in slowest))
+        for name, c in snapshot["caches"].items():
+            parts.append(f"{name} cache {c['hits']}/{c['hits'] + c['misses']} hits")
+        return " | ".join(parts)
+
+    def funnel_line(self, snapshot):
+        """'universe 551 -> fetched 551 -> sentiment_checked 26 -> alerted 3'."""
+        return " -> ".join(f"{step} {n}" for step, n in snapshot["funnel"].items())
+
+    def decisions_line(self, snapshot):
+        """'BEARISH_SKIP 121 | WEAK_TECH 26 | NO TRADE 392 | WATCHLIST 12'."""
+        return " | ".join(f"{decision} {n}" for decision, n in snapshot["decisions"].items()) or "none"
+
+    def to_prometheus(self, snapshot):
+        """Prometheus text exposition format (all gauges, values of the latest scan)."""
+        lines = []
+
+        def metric(name, help_text, samples):
+            lines.append(f"# HELP {PROM_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {PROM_PREFIX}_{name} gauge")
+            for labels, value in samples:
+                label_str = ",".join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"{PROM_PREFIX}_{name}{{{label_str}}} {value}" if label_str
+                             else f"{PROM_PREFIX}_{name} {value}")
+
+        metric("scan_duration_seconds", "Wall time of the latest scan.", [({}, snapshot["scan_seconds"])])
+        metric("scan_budget_seconds", "Target scan duration.", [({}, snapshot["budget_seconds"])])
+        metric("scan_over_budget", "1 if the latest scan exceeded its budget.", [({}, int(snapshot["over_budget"]))])
+        metric("scan_timestamp_seconds", "Unix time the latest scan finished.", [({}, int(time.time()))])
+        # Background calls span scans (cumulative since start), hence their own metric names
+        for table, prefix, label in (("stages", "stage", "stage"), ("providers", "provider", "provider"),
+                                     ("background", "background_provider", "provider")):
+            timers = snapshot[table].items()
+            metric(f"{prefix}_seconds", f"Summed call time per {prefix}.",
+                   [({label: n}, t["seconds"]) for n, t in timers])
+            metric(f"{prefix}_wall_seconds", f"First start to last end per {prefix}.",
+                   [({label: n}, t["wall_seconds"]) for n, t in timers])
+            metric(f"{prefix}_calls", f"Calls per {prefix}.",
+                   [({label: n}, t["calls"]) for n, t in timers])
+            metric(f"{prefix}_errors", f"Failed calls per {prefix}.",
+                   [({label: n}, t["errors"]) for n, t in timers])
+        metric("cache_hits", "Cache hits per cache.",
+               [({"cache": n}, c["hits"]) for n, c in snapshot["caches"].items()])
+        metric("cache_misses", "Cache misses per cache.",
+               [({"cache": n}, c["misses"]) for n, c in snapshot["caches"].items()])
+        metric("funnel_symbols", "Symbols reaching each scan funnel step.",
+               [({"step": step}, n) for step, n in snapshot["funnel"].items()])
+        metric("decision_symbols", "Symbols per strategy decision.",
+               [({"decision": decision}, n) for decision, n in snapshot["decisions"].items()])
+        return "\n".join(lines) + "\n"
+
+    def export(self, snapshot):
+        """Appends the snapshot to the JSONL log and rewrites the Prometheus textfile."""
+        try:
+            os.makedirs(os.path.dirname(self.jsonl_path), exist_ok=True)
+            with open(self.jsonl_path, 'a') as f:
+                f.write(json.dumps(snapshot) + "\n")
+        except Exception as e:
+            print(f"[METRICS] JSONL write error: {e}")
+        try:
+            # Atomic, so the textfile collector never reads half a file
+            os.makedirs(os.path.dirname(self.textfile_path), exist_ok=True)
+            tmp_path = self.textfile_path + ".tmp"
+            with open(tmp_path, 'w') as f:
+                f.write(self.to_prometheus(snapshot))
+            os.replace(tmp_path, self.textfile_path)
+        except Exception as e:
+            print(f"[METRICS] Textfile write error: {e}")
+
+scan_metrics = ScanMetrics()
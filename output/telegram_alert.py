@@ -1,37 +1,31 @@
 import requests
 import sys
 import os
-import yfinance as yf
+import time
+import queue
+import threading
 from datetime import datetime
 
 # Add parent to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
+from data.symbol_metadata import symbol_metadata
+from output.metrics import scan_metrics
 
 def get_company_name(symbol):
-    try:
-        t = yf.Ticker(symbol)
-        return t.info.get('longName', symbol)
-    except:
-        return symbol
+    # Local metadata index, no network call per alert
+    return symbol_metadata.name(symbol)
 
-def send_telegram_alert(signal_data):
+MAX_MESSAGE_LENGTH = 4096 # Telegram hard limit per message
+MESSAGE_SEPARATOR = "\n\n━━━━━━━━━━━━━━━━\n\n"
+
+def format_alert_message(signal_data):
     """
-    Sends a Telegram alert for a valid swing setup.
-    
-    Args:
-        signal_data (dict): Result dictionary from strategy.
+    Builds the alert text for a valid swing setup.
     """
-    if not signal_data.get("valid"):
-        return
-
     company_name = get_company_name(signal_data['symbol'])
     current_time = datetime.now().strftime("%Y-%m-%d %I:%M %p")
     
-
-
-
-
     # Construct Message
     message = f"""🔥POTENTIAL TICKER DETECTED🔥
 
@@ -61,22 +55,175 @@ Do your best let god do the rest
 
 ⏰ {current_time}
 """
+    return message[:MAX_MESSAGE_LENGTH]
 
-    url = f"https://api.telegram.org/bot{config.TELEGRAM_BOT_TOKEN}/sendMessage"
-    payload = {
-        "chat_id": config.TELEGRAM_CHAT_ID,
-        "text": message,
-        "parse_mode": "HTML" # Or Markdown, but plain text is safer if symbols are weird. Sticking to plain text implicitly or HTML? 
-        # The sample had bolding. Let's try to add no parse_mode first to be safe, or just standard text.
-        # Actually user prompt used some bolding logic in visual representation, but raw text in python string.
-        # I will send as plain text to ensure delivery, or minimal markdown.
-    }
-    
-    try:
-        response = requests.post(url, data=payload)
-        if response.status_code != 200:
-            print(f"Failed to send Telegram alert: {response.text}")
+def merge_messages(alerts):
+    """
+    Packs (symbol, message) alerts into as few Telegram-sized texts as possible,
+    keeping their order.
+
+    Returns:
+        list: (symbols, text) per Telegram message.
+    """
+    merged = []
+    for symbol, message in alerts:
+        if merged and len(merged[-1][1]) + len(MESSAGE_SEPARATOR) + len(message) <= MAX_MESSAGE_LENGTH:
+            merged[-1][0].append(symbol)
+            merged[-1][1] += MESSAGE_SEPARATOR + message
         else:
-            print(f"Telegram alert sent for {signal_data['symbol']}")
-    except Exception as e:
-        print(f"Error sending Telegram: {e}")
+            merged.append([[symbol], message])
+    return [(symbols, text) for symbols, text in merged]
+
+class AlertDispatcher:
+    """
+    Sends Telegram alerts from a background thread.
+    The scan only enqueues (never blocks on the network); the worker merges bursts,
+    paces messages per chat, and retries with backoff on 429 / 5xx / network errors
+    over one keep-alive session.
+    """
+    def __init__(self, chat_id=None, max_queue=None):
+        self.chat_id = chat_id
+        self.queue = queue.Queue(maxsize=max_queue or config.TELEGRAM_QUEUE_SIZE)
+        self.session = requests.Session()
+        self.last_sent = 0.0
+        self.thread = None
+        self.lock = threading.Lock()
+        self.undelivered = [] # Symbols whose alert was given up on
+
+    def _ensure_worker(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name="telegram-alerts", daemon=True)
+                self.thread.start()
+
+    def enqueue(self, signal_data):
+        """
+        Queues an alert for a valid swing setup. Returns immediately.
+        
+        Args:
+            signal_data (dict): Result dictionary from strategy.
+        
+        Returns:
+            bool: False if the alert was dropped (invalid signal or queue full).
+        """
+        if not signal_data.get("valid"):
+            return False
+        
+        # Format now so the timestamp reflects detection, not delivery
+        message = format_alert_message(signal_data)
+        try:
+            self.queue.put_nowait((signal_data['symbol'], message))
+        except queue.Full:
+            print(f"[TELEGRAM] Queue full, dropping alert for {signal_data['symbol']}")
+            return False
+        self._ensure_worker()
+        return True
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            # Collect the rest of the burst
+            deadline = time.monotonic() + config.TELEGRAM_BURST_WINDOW_SECONDS
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            sent = []
+            try:
+                for symbols, text in merge_messages(batch):
+                    if self._send(text):
+                        sent.extend(symbols)
+                if sent:
+                    print(f"Telegram alert sent for {', '.join(sent)}")
+            except Exception as e:
+                print(f"Error sending Telegram: {e}")
+            finally:
+                failed = [symbol for symbol, _ in batch if symbol not in sent]
+                if failed:
+                    print(f"[TELEGRAM] Failed to deliver alerts for {', '.join(failed)}")
+                    with self.lock:
+                        self.undelivered.extend(failed)
+                for _ in batch:
+                    self.queue.task_done()
+
+    def _wait_for_slot(self):
+        # Per-chat pacing
+        wait = self.last_sent + config.TELEGRAM_MIN_INTERVAL_SECONDS - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+
+    def _send(self, text):
+        url = f"https://api.telegram.org/bot{config.TELEGRAM_BOT_TOKEN}/sendMessage"
+        payload = {
+            "chat_id": self.chat_id or config.TELEGRAM_CHAT_ID,
+            "text": text,
+            "parse_mode": "HTML"
+        }
+        
+        for attempt in range(config.TELEGRAM_MAX_RETRIES + 1):
+            self._wait_for_slot()
+            delay = 2 ** attempt
+            try:
+                with scan_metrics.provider("telegram", background=True):
+                    response = self.session.post(url, data=payload, timeout=(5, 15))
+                self.last_sent = time.monotonic()
+                if response.status_code == 200:
+                    return True
+                if response.status_code == 429:
+                    # Telegram says exactly how long to back off
+                    try:
+                        delay = response.json().get("parameters", {}).get("retry_after", delay)
+                    except ValueError:
+                        pass
+                elif response.status_code < 500:
+                    print(f"Failed to send Telegram alert: {response.text}")
+                    return False
+                print(f"[TELEGRAM] HTTP {response.status_code}, retrying in {delay}s")
+            except requests.RequestException as e:
+                self.last_sent = time.monotonic()
+                print(f"[TELEGRAM] {e}, retrying in {delay}s")
+            if attempt < config.TELEGRAM_MAX_RETRIES:
+                time.sleep(delay)
+        
+        print("Failed to send Telegram alert: retries exhausted")
+        return False
+
+    def pending(self):
+        """Alerts queued or being sent right now."""
+        return self.queue.unfinished_tasks
+
+    def flush(self, timeout=None):
+        """
+        Waits until every queued alert has been sent (or given up on).
+        Symbols given up on are listed in `undelivered`.
+        
+        Returns:
+            bool: True if the queue drained within `timeout` seconds.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.queue.all_tasks_done.wait(remaining)
+        return True
+
+alert_dispatcher = AlertDispatcher()
+
+def send_telegram_alert(signal_data):
+    """
+    Queues a Telegram alert for a valid swing setup (non-blocking).
+    
+    Args:
+        signal_data (dict): Result dictionary from strategy.
+
+    Returns:
+        bool: False if the alert was dropped (see AlertDispatcher.enqueue).
+    """
+    return alert_dispatcher.enqueue(signal_data)
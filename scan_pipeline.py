@@ -0,0 +1,141 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import config
+from data import market_data
+from output.metrics import scan_metrics
+
+# Pipelined scan executor.
+# Price chunks are fetched on a bounded pool; each chunk is run through indicators and
+# the batch screen as soon as it lands, and survivors go to a second pool for the
+# I/O-heavy fundamental checks. Sentiment candidates are then sent to Gemini in
+# batched requests. Alerts are handed to a non-blocking sender (the Telegram dispatcher).
+# Results are re-assembled in universe order, so output never depends on timing.
+
+_stage_locks = {}
+_stage_locks_guard = threading.Lock()
+
+def stage_slot(stage):
+    """
+    Returns the semaphore bounding in-flight calls for a scan stage
+    (config.STAGE_LIMITS), e.g. `with stage_slot("llm"): ...`.
+    """
+    with _stage_locks_guard:
+        if stage not in _stage_locks:
+            _stage_locks[stage] = threading.BoundedSemaphore(config.STAGE_LIMITS.get(stage, 4))
+        return _stage_locks[stage]
+
+class ScanPipeline:
+    def __init__(self, strategy, indicator_engine, source=None):
+        self.strategy = strategy
+        self.indicator_engine = indicator_engine
+        # Bar source with the market_data fetch functions (data.replay.ReplaySource offline)
+        self.source = source or market_data
+        # symbol -> last-bar snapshot row (Close, MA20, RSI, ...) from the latest run
+        self.latest_bars = {}
+
+    def _fetch_chunk(self, chunk, live_quotes=False):
+        # Live scans only refresh today's bar for symbols whose history is stored
+        fetch = self.source.fetch_latest_bars if live_quotes else self.source.fetch_bulk_data
+        with stage_slot("fetch"), scan_metrics.stage("fetch"):
+            return fetch(
+                chunk,
+                period=config.HISTORY_PERIOD,
+                interval=config.TIMEFRAME,
+                chunk_size=config.DOWNLOAD_CHUNK_SIZE
+            )
+
+    def _score(self, df, symbol):
+        with scan_metrics.stage("score"):
+            return self.strategy.score_pre_sentiment(df, symbol)
+
+    def run(self, symbols, should_alert=None, send_alert=None, live_quotes=False):
+        """
+        Scans `symbols` through fetch -> indicators -> screen -> deep score -> alert.
+
+        Args:
+            symbols (list): Universe to scan, also the order of the returned results.
+            should_alert (callable): result -> bool. Called on the coordinating thread,
+                so it may update shared state (e.g. the sent-alert cache).
+            send_alert (callable): result -> bool, False if the alert was dropped.
+                Called on the coordinating thread, so it must only enqueue
+                (see output.telegram_alert.AlertDispatcher).
+            live_quotes (bool): Patch today's bar from a bulk quote instead of
+                downloading bars (see data.market_data.fetch_latest_bars).
+
+        Returns:
+            tuple: (results, failures) - results in `symbols` order (symbols without
+            price data are left out), failures maps symbol -> fetch error.
+        """
+        limits = config.STAGE_LIMITS
+        chunk_size = config.DOWNLOAD_CHUNK_SIZE
+        chunks = [symbols[i:i + chunk_size] for i in range(0, len(symbols), chunk_size)]
+
+        results = {}
+        failures = {}
+        scan_metrics.count("universe", len(symbols))
+
+        fetch_pool = ThreadPoolExecutor(max_workers=limits["fetch"], thread_name_prefix="fetch")
+        score_pool = ThreadPoolExecutor(max_workers=limits["score"], thread_name_prefix="score")
+
+        def handle(result):
+            results[result['symbol']] = result
+            scan_metrics.count(result['decision'])
+            if result['valid'] and send_alert and (should_alert is None or should_alert(result)):
+                try:
+                    if send_alert(result):
+                        scan_metrics.count("alerted")
+                except Exception as e:
+                    print(f"[PIPELINE] Alert failed: {e}")
+
+        try:
+            fetch_futures = {fetch_pool.submit(self._fetch_chunk, chunk, live_quotes): chunk for chunk in chunks}
+            score_futures = {}
+
+            # CPU stage runs on this thread while other chunks are still downloading
+            for future in as_completed(fetch_futures):
+                frames, chunk_failures = future.result()
+                failures.update(chunk_failures)
+
+                chunk_symbols = [s for s in fetch_futures[future] if s in frames]
+                scan_metrics.count("fetched", len(chunk_symbols))
+                with scan_metrics.stage("indicators"):
+                    for symbol in chunk_symbols:
+                        frames[symbol] = self.indicator_engine.update(symbol, frames[symbol])
+
+                with scan_metrics.stage("screen"):
+                    snapshot = self.strategy.build_snapshot(frames, chunk_symbols)
+                    self.latest_bars.update(snapshot.to_dict('index'))
+                    screened = self.strategy.screen_results(frames, chunk_symbols, snapshot=snapshot)
+                for symbol, result in zip(chunk_symbols, screened):
+                    if result is None:
+                        f = score_pool.submit(self._score, frames[symbol], symbol)
+                        score_futures[f] = symbol
+                    else:
+                        handle(result)
+
+            states = {}
+            for future in as_completed(score_futures):
+                symbol = score_futures[future]
+                try:
+                    result, state = future.result()
+                except Exception as e:
+                    print(f"[PIPELINE] Scoring failed for {symbol}: {e}")
+                    continue
+                if result is not None:
+                    handle(result)
+                else:
+                    states[symbol] = state
+
+            # Sentiment for all candidates in a handful of batched LLM requests
+            with scan_metrics.stage("sentiment"):
+                finalized = self.strategy.finalize_batch(states)
+            for symbol in symbols:
+                if symbol in finalized:
+                    handle(finalized[symbol])
+        finally:
+            fetch_pool.shutdown(wait=False, cancel_futures=True)
+            score_pool.shutdown(wait=False, cancel_futures=True)
+
+        ordered = [results[s] for s in symbols if s in results]
+        return ordered, failures
@@ -0,0 +1,217 @@
+import os
+import re
+import sys
+import time
+import threading
+import sysconfig
+from collections import Counter
+
+# Wall-clock sampling profiler for scans (main.py --profile).
+# A background thread snapshots every thread's Python stack (sys._current_frames)
+# every few milliseconds, so the fetch / score / news pool threads are covered too;
+# cProfile would only see the thread that enabled it. Samples of threads that are
+# just waiting (idle pool workers, as_completed, the alert dispatcher) are dropped,
+# so what is left is where the scan actually spends its time, network reads included.
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+STDLIB = os.path.normcase(sysconfig.get_paths()["stdlib"])
+
+# (file name, function) of leaf frames that mean "blocked, nothing to do"
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("threading.py", "join"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"), # concurrent.futures worker parked on its work queue
+    ("selectors.py", "select"),
+}
+
+def _thread_group(name):
+    """'fetch_3' -> 'fetch', 'ThreadPoolExecutor-0_1' -> 'ThreadPoolExecutor-0'."""
+    return re.sub(r"_\d+$", "", name)
+
+def classify(filename):
+    """
+    ('own', module path) for files of this repo, otherwise ('third-party', package),
+    where package is the top-level distribution (pandas, ta, yfinance, ...) or
+    'stdlib:<module>' for the standard library.
+    """
+    if filename.startswith("<"):
+        # Not a real path ('<frozen genericpath>', '<string>'); abspath would
+        # resolve it against the cwd and pass it off as own code
+        if filename.startswith("<frozen "):
+            return "third-party", "stdlib:" + filename[len("<frozen "):-1].split(".")[0]
+        return "third-party", "<builtin>"
+    path = os.path.normcase(os.path.abspath(filename))
+    parts = re.split(r"[\\/]", path)
+    for marker in ("site-packages", "dist-packages"):
+        if marker in parts:
+            package = parts[parts.index(marker) + 1]
+            return "third-party", package[:-3] if package.endswith(".py") else package
+    if path.startswith(os.path.normcase(ROOT) + os.sep):
+        return "own", os.path.relpath(path, os.path.normcase(ROOT))
+    if path.startswith(STDLIB):
+        module = os.path.relpath(path, STDLIB).split(os.sep)[0]
+        return "third-party", "stdlib:" + (module[:-3] if module.endswith(".py") else module)
+    return "third-party", os.path.basename(filename)
+
+class SamplingProfiler:
+    """
+    Use as a context manager (or start()/stop()) around the code to profile;
+    it can be entered repeatedly and the samples add up.
+    """
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.stacks = Counter() # (thread group, frame, ..., leaf frame) -> samples
+        self.idle_samples = 0
+        self.seconds = 0.0
+        self._labels = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self._started = None
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            kind, where = classify(code.co_filename)
+            name = getattr(code, "co_qualname", code.co_name)
+            label = (kind, where, f"{where}:{name}")
+            self._labels[code] = label
+        return label
+
+    def _sample(self, own_ident):
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            code = frame.f_code
+            if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                self.idle_samples += 1
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+            stack.reverse()
+            self.stacks[(_thread_group(names.get(ident, "thread")),) + tuple(stack)] += 1
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self._sample(own_ident)
+
+    def start(self):
+        self._stop.clear()
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.seconds += time.perf_counter() - self._started
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # --- Reports ---
+
+    def collapsed(self):
+        """Collapsed stacks ('thread;frame;frame count' per line) for flamegraph.pl / speedscope."""
+        lines = []
+        for stack, count in self.stacks.most_common():
+            frames = [stack[0]] + [self._label(code)[2] for code in stack[1:]]
+            lines.append(f"{';'.join(frames)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def call_tree(self, min_percent=1.0):
+        """Indented call tree with inclusive sample share, pruned below `min_percent`."""
+        total = sum(self.stacks.values())
+        tree = {}
+        for stack, count in self.stacks.items():
+            node = tree
+            for key in (stack[0],) + tuple(self._label(code)[2] for code in stack[1:]):
+                entry = node.setdefault(key, [0, {}])
+                entry[0] += count
+                node = entry[1]
+
+        lines = [f"{total} samples every {self.interval * 1000:.0f} ms over {self.seconds:.1f}s "
+                 f"({self.idle_samples} idle samples dropped)"]
+
+        def walk(node, depth):
+            for key, (count, children) in sorted(node.items(), key=lambda kv: -kv[1][0]):
+                percent = 100.0 * count / total
+                if percent < min_percent:
+                    continue
+                lines.append(f"{percent:6.1f}% {count:7d}  {'  ' * depth}{key}")
+                walk(children, depth + 1)
+
+        if total:
+            walk(tree, 0)
+        return "\n".join(lines) + "\n"
+
+    def hottest(self, top=15):
+        """
+        Top functions by self samples, split into own code and third-party code,
+        plus the third-party share per package.
+
+        Returns:
+            dict: {"own": [(label, self, total)], "third-party": [...], "packages": [(package, self)]}
+        """
+        self_counts = Counter()
+        total_counts = Counter()
+        packages = Counter()
+        for stack, count in self.stacks.items():
+            if len(stack) < 2:
+                continue
+            leaf = self._label(stack[-1])
+            self_counts[leaf] += count
+            if leaf[0] == "third-party":
+                packages[leaf[1]] += count
+            for label in {self._label(code) for code in stack[1:]}:
+                total_counts[label] += count
+
+        report = {"own": [], "third-party": [], "packages": packages.most_common(top)}
+        for label, count in self_counts.most_common():
+            rows = report[label[0]]
+            if len(rows) < top:
+                rows.append((label[2], count, total_counts[label]))
+        return report
+
+    def format_hottest(self, top=15):
+        total = sum(self.stacks.values()) or 1
+        report = self.hottest(top)
+        lines = []
+        for kind in ("own", "third-party"):
+            lines.append(f"Hottest {kind} functions (self % / total % of {total} samples):")
+            for label, self_count, total_count in report[kind]:
+                lines.append(f"  {100.0 * self_count / total:5.1f}% {100.0 * total_count / total:6.1f}%  {label}")
+        lines.append("Third-party self time by package:")
+        lines.append("  " + ", ".join(f"{p} {100.0 * n / total:.1f}%" for p, n in report["packages"]))
+        return "\n".join(lines) + "\n"
+
+    def write_reports(self, out_dir, top=15, prefix=None):
+        """
+        Writes <prefix>.collapsed.txt, <prefix>.tree.txt and <prefix>.top.txt to `out_dir`.
+
+        Returns:
+            list: Paths written.
+        """
+        os.makedirs(out_dir, exist_ok=True)
+        prefix = prefix or time.strftime("scan_%Y%m%d_%H%M%S")
+        reports = {
+            "collapsed": self.collapsed(),
+            "tree": self.call_tree(),
+            "top": self.format_hottest(top),
+        }
+        paths = []
+        for name, text in reports.items():
+            path = os.path.join(out_dir, f"{prefix}.{name}.txt")
+            with open(path, 'w') as f:
+                f.write(text)
+            paths.append(path)
+        return paths
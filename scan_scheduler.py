@@ -0,0 +1,151 @@
+import math
+import datetime
+
+import config
+
+# Priority-tiered rescans for the live loop.
+# After every scan each symbol is placed in a tier by how close it is to the
+# ConfluenceStrategy thresholds, and the tier decides when it is scanned next.
+# Hot names (near 65, RSI pullback, volume building) are rescanned every minute,
+# deep BEARISH_SKIP names every 15-30 minutes. Symbols move between tiers as
+# their numbers change. Last results are kept so the sheet always shows everyone.
+
+TIER_ORDER = ["new", "hot", "warm", "cold", "frozen"] # Scan order within one loop
+
+def _value(bar, key):
+    try:
+        value = float(bar.get(key))
+    except (TypeError, ValueError):
+        return math.nan
+    return value
+
+def classify(result, bar):
+    """
+    Picks the rescan tier for one symbol from its latest result and last-bar snapshot.
+
+    Args:
+        result (dict): Strategy result (may be an early exit like BEARISH_SKIP).
+        bar (dict): Snapshot row (Close, MA20, MA50, RSI, Volume, VolMA20), or None.
+
+    Returns:
+        str: "hot", "warm", "cold" or "frozen".
+    """
+    decision = result.get('decision')
+    if result.get('valid') or result.get('score', 0) >= config.SCAN_HOT_SCORE:
+        return "hot"
+    if decision == "NO DATA" or not bar:
+        return "frozen"
+
+    close = _value(bar, 'Close')
+    ma50 = _value(bar, 'MA50')
+    rsi = _value(bar, 'RSI')
+    vol = _value(bar, 'Volume')
+    vol_ma = _value(bar, 'VolMA20')
+
+    if decision == "BEARISH_SKIP":
+        # RSI < 30 lets a bearish name through the trend filter, MA50 reclaim too
+        gap = (ma50 - close) / ma50 if ma50 > 0 else math.inf
+        if gap <= 0.02 or rsi < 35:
+            return "warm"
+        if gap <= 0.10:
+            return "cold"
+        return "frozen"
+
+    rsi_pullback = 40 <= rsi < 50 and close > ma50
+    volume_building = vol > vol_ma > 0
+    if rsi_pullback or volume_building:
+        return "hot"
+    return "warm"
+
+class ScanScheduler:
+    def __init__(self, intervals=None):
+        self.intervals = intervals or config.SCAN_TIER_MINUTES
+        self.tiers = {}        # symbol -> tier
+        self.next_due = {}     # symbol -> datetime
+        self.last_results = {} # symbol -> latest result
+        self.timings = {}      # tier -> loop stats
+        self.pending_lag = {}  # tier -> seconds late, for the symbols handed out by due()
+
+    def due(self, symbols, now):
+        """
+        Symbols to scan now, grouped by tier in TIER_ORDER (unseen symbols come first).
+
+        Returns:
+            dict: tier -> list of symbols (universe order within a tier).
+        """
+        groups = {tier: [] for tier in TIER_ORDER}
+        lags = {tier: [] for tier in TIER_ORDER}
+        for symbol in symbols:
+            due_at = self.next_due.get(symbol)
+            if due_at is None:
+                groups["new"].append(symbol)
+            elif due_at <= now:
+                tier = self.tiers[symbol]
+                groups[tier].append(symbol)
+                lags[tier].append((now - due_at).total_seconds())
+        self.pending_lag = {t: sum(l) / len(l) for t, l in lags.items() if l}
+        return {tier: group for tier, group in groups.items() if group}
+
+    def record(self, tier, symbols, results, bars, now, seconds):
+        """
+        Stores the results of one tier's scan, re-tiers its symbols and schedules them.
+        Symbols that came back without a result (fetch failure, empty frame) back off
+        to the frozen tier, so they are not refetched in full on every loop.
+
+        Args:
+            tier (str): Tier that was scanned (as returned by due()).
+            symbols (list): Symbols handed to the scan for this tier.
+            results (list): Strategy results.
+            bars (dict): symbol -> snapshot row (ScanPipeline.latest_bars).
+            now (datetime): Scan time.
+            seconds (float): Wall time the tier's scan took.
+        """
+        for result in results:
+            symbol = result['symbol']
+            new_tier = classify(result, bars.get(symbol))
+            self.tiers[symbol] = new_tier
+            self.last_results[symbol] = result
+            self.next_due[symbol] = now + datetime.timedelta(minutes=self.intervals[new_tier])
+
+        scanned = {result['symbol'] for result in results}
+        backoff = now + datetime.timedelta(minutes=self.intervals["frozen"])
+        for symbol in symbols:
+            if symbol not in scanned:
+                self.tiers[symbol] = "frozen"
+                self.next_due[symbol] = backoff
+
+        stats = self.timings.setdefault(tier, {"runs": 0, "total_seconds": 0.0})
+        stats["runs"] += 1
+        stats["total_seconds"] += seconds
+        stats["last_seconds"] = seconds
+        stats["last_symbols"] = len(symbols)
+        stats["avg_seconds"] = stats["total_seconds"] / stats["runs"]
+        stats["lag_seconds"] = self.pending_lag.get(tier, 0.0)
+        stats["last_run"] = now.isoformat()
+
+    def results(self, symbols):
+        """Latest known result for every scanned symbol, in `symbols` order."""
+        return [self.last_results[s] for s in symbols if s in self.last_results]
+
+    def tier_counts(self):
+        counts = {}
+        for tier in self.tiers.values():
+            counts[tier] = counts.get(tier, 0) + 1
+        return counts
+
+    def tier_timings(self):
+        """tier -> {runs, last_seconds, avg_seconds, last_symbols, lag_seconds, last_run}."""
+        return {tier: dict(stats) for tier, stats in self.timings.items()}
+
+    def summary(self):
+        """
+        One line for the scan log, e.g.
+        'hot 42 (1m, last 3.1s, avg 2.8s) | warm 120 (5m, ...) | ...'
+        """
+        counts = self.tier_counts()
+        parts = []
+        for tier in TIER_ORDER[1:]:
+            stats = self.timings.get(tier)
+            timing = f", last {stats['last_seconds']:.1f}s, avg {stats['avg_seconds']:.1f}s, late {stats['lag_seconds']:.0f}s" if stats else ""
+            parts.append(f"{tier} {counts.get(tier, 0)} ({self.intervals[tier]}m{timing})")
+        return " | ".join(parts)
@@ -0,0 +1,316 @@
+import time
+import numpy as np
+import pandas as pd
+from indicators.panel import build_panel, compute_panel_indicators
+
+# Vectorized backtest for ConfluenceStrategy.
+# The technical and flow rules (screen_batch) run on (dates x symbols) arrays in one
+# pass, so every historical day of every symbol is scored at once. Fundamentals and
+# sentiment are point-in-time inputs supplied by the caller. Each signal is then
+# simulated with the alert's own plan: buy zone close..1.02*close, stop 0.95*close,
+# target 1.05*close.
+
+ENTRY_ZONE = 1.02
+STOP = 0.95
+TARGET = 1.05
+
+
+def _point_in_time(values, dates, symbols, default=np.nan):
+    """
+    Aligns a point-in-time input to a (dates x symbols) array.
+
+    values may be None (default everywhere), a scalar, a dict symbol -> value
+    (constant over time) or a DataFrame indexed by date with symbol columns;
+    the DataFrame is forward-filled, so each day sees the latest value known then.
+    """
+    shape = (len(dates), len(symbols))
+    if values is None:
+        return np.full(shape, default, dtype=float)
+    if np.isscalar(values):
+        return np.full(shape, float(values))
+    if isinstance(values, dict):
+        row = np.array([values.get(s, default) for s in symbols], dtype=float)
+        return np.broadcast_to(row, shape).copy()
+    aligned = values.reindex(columns=symbols).sort_index()
+    dates_naive = dates.tz_localize(None) if dates.tz is not None else dates
+    if aligned.index.tz is not None:
+        aligned.index = aligned.index.tz_localize(None)
+    return aligned.reindex(dates_naive, method='ffill').to_numpy(dtype=float)
+
+
+def score_panel(strategy, indicators, fundamentals=None, sentiment=None):
+    """
+    ConfluenceStrategy's decision for every (date, symbol) of a PanelIndicators.
+
+    Args:
+        strategy (ConfluenceStrategy): Supplies screen_batch (flow + technical rules).
+        indicators (PanelIndicators): From compute_panel_indicators.
+        fundamentals: Fundamental points (0-15) per symbol/date, see _point_in_time.
+            Missing = 0 points.
+        sentiment: Gemini ai_score (-100..100) per symbol/date. Missing = no sentiment.
+
+    Returns:
+        dict of (dates x symbols) arrays: score, valid, decision (0 none,
+        1 BIG ACCUM FOCUS, 2 WATCHLIST, 3 STRONG BUY), close.
+    """
+    dates, symbols = indicators.dates, indicators.symbols
+    close = indicators.field('Close')
+    valid_bar = np.isfinite(close)
+
+    # Previous bar's close (skipping dates without a bar) and bars seen so far
+    prev_close = pd.DataFrame(close).ffill().shift(1).to_numpy(copy=True)
+    prev_close[~valid_bar] = np.nan
+    bars = np.cumsum(valid_bar, axis=0)
+    bars[~valid_bar] = 0
+
+    snapshot = {
+        'Close': close, 'PrevClose': prev_close,
+        'High': indicators.field('High'), 'Low': indicators.field('Low'),
+        'Volume': indicators.field('Volume'), 'MA20': indicators.field('MA20'),
+        'MA50': indicators.field('MA50'), 'RSI': indicators.field('RSI'),
+        'VolMA20': indicators.field('VolMA20'), 'Bars': bars,
+    }
+    screen = strategy.screen_batch(snapshot)
+
+    fund_pts = np.nan_to_num(_point_in_time(fundamentals, dates, symbols, default=0.0))
+    ai_score = _point_in_time(sentiment, dates, symbols)
+
+    score = screen['flow_score'] + screen['tech_score'] + fund_pts
+    # Sentiment only for setups that already look good (needs_sentiment)
+    with np.errstate(invalid='ignore'):
+        asked = (score >= 45) & np.isfinite(ai_score)
+        score = score + np.where(asked & (ai_score > 20), 20, 0) - np.where(asked & (ai_score < -20), 20, 0)
+
+    survivors = screen['survivors'] & valid_bar
+    strong_buy = survivors & (score >= 85) & screen['has_strong_flow']
+    watchlist = survivors & ~strong_buy & (score >= 65)
+    accum_focus = survivors & ~strong_buy & ~watchlist & (screen['flow_score'] >= 30)
+
+    decision = np.select([strong_buy, watchlist, accum_focus], [3, 2, 1], default=0)
+    return {
+        "score": np.where(survivors, score, np.nan),
+        "valid": decision > 0,
+        "decision": decision,
+        "close": close,
+    }
+
+
+DECISION_NAMES = {1: "BIG ACCUM FOCUS", 2: "WATCHLIST", 3: "STRONG BUY"}
+
+
+def simulate_trades(indicators, scores, entry_days=1, max_hold=10):
+    """
+    Simulates the alert plan for every signal, all signals at once.
+
+    Entry: within `entry_days` sessions after the signal, at the open if it is inside
+    the buy zone, else at the zone top (1.02 x signal close) if the low reaches it.
+    Exit: stop (0.95 x) or target (1.05 x) from the entry day on, filling at the open
+    on gaps; stop wins when both are touched the same day. Otherwise the close after
+    `max_hold` sessions. Signals are evaluated independently (overlaps are kept).
+
+    Returns:
+        pd.DataFrame: One row per signal.
+    """
+    open_, high, low, close = (indicators.field(f) for f in ('Open', 'High', 'Low', 'Close'))
+    n_dates = len(indicators.dates)
+    sig_t, sig_s = np.nonzero(scores['valid'])
+    ref = close[sig_t, sig_s]
+    zone_top, stop, target = ref * ENTRY_ZONE, ref * STOP, ref * TARGET
+
+    n = len(sig_t)
+    entry_t = np.full(n, -1)
+    entry_px = np.full(n, np.nan)
+    with np.errstate(invalid='ignore'):
+        for k in range(1, entry_days + 1):
+            t = sig_t + k
+            pending = (entry_t < 0) & (t < n_dates)
+            tc = np.minimum(t, n_dates - 1)
+            o, l = open_[tc, sig_s], low[tc, sig_s]
+            at_open = pending & (o <= zone_top)
+            at_zone = pending & ~at_open & (l <= zone_top)
+            entry_px = np.where(at_open, o, np.where(at_zone, zone_top, entry_px))
+            entry_t = np.where(at_open | at_zone, t, entry_t)
+
+        filled = entry_t >= 0
+        exit_t = np.full(n, -1)
+        exit_px = np.full(n, np.nan)
+        reason = np.where(filled, "open", "no_fill").astype(object)
+        last_close = np.full(n, np.nan)
+        last_t = np.full(n, -1)
+        for k in range(max_hold):
+            t = entry_t + k
+            active = filled & (exit_t < 0) & (t < n_dates)
+            tc = np.clip(t, 0, n_dates - 1)
+            o, h, l, c = open_[tc, sig_s], high[tc, sig_s], low[tc, sig_s], close[tc, sig_s]
+            # Gaps only matter after the entry bar (entry already happened at/after the open)
+            gap_ok = k > 0
+            hit_stop = active & (l <= stop)
+            hit_target = active & ~hit_stop & (h >= target)
+            stop_px = np.where(gap_ok & (o < stop), o, stop)
+            target_px = np.where(gap_ok & (o > target), o, target)
+            exit_px = np.where(hit_stop, stop_px, np.where(hit_target, target_px, exit_px))
+            reason = np.where(hit_stop, "stop", np.where(hit_target, "target", reason))
+            exit_t = np.where(hit_stop | hit_target, t, exit_t)
+            has_bar = active & np.isfinite(c)
+            last_close = np.where(has_bar, c, last_close)
+            last_t = np.where(has_bar, t, last_t)
+
+        timed_out = filled & (exit_t < 0)
+        # Held to the end of the data window: not a timeout yet
+        still_open = timed_out & (entry_t + max_hold > n_dates)
+        exit_px = np.where(timed_out, last_close, exit_px)
+        exit_t = np.where(timed_out, last_t, exit_t)
+        reason = np.where(timed_out & ~still_open, "timeout", reason)
+
+    dates = indicators.dates
+    return pd.DataFrame({
+        "date": dates[sig_t],
+        "symbol": np.asarray(indicators.symbols, dtype=object)[sig_s],
+        "decision": [DECISION_NAMES[d] for d in scores['decision'][sig_t, sig_s]],
+        "score": scores['score'][sig_t, sig_s],
+        "signal_close": ref,
+        "entry_date": np.where(filled, dates[np.maximum(entry_t, 0)], pd.NaT),
+        "entry": entry_px,
+        "exit": exit_px,
+        "exit_reason": reason,
+        "holding_days": np.where(filled, exit_t - entry_t, np.nan),
+        "return_pct": (exit_px / entry_px - 1) * 100,
+    })
+
+
+def summarize(trades):
+    """
+    Hit rates and returns overall and per decision.
+
+    Returns:
+        pd.DataFrame: signals, fill_rate, hit_rate (target / filled), stop_rate,
+        timeout_rate, avg_return_pct, median_return_pct, win_rate.
+    """
+    def stats(group):
+        filled = group[group['exit_reason'] != "no_fill"]
+        closed = filled[filled['exit_reason'] != "open"]
+        n = max(len(filled), 1)
+        return pd.Series({
+            "signals": len(group),
+            "fill_rate": len(filled) / max(len(group), 1),
+            "hit_rate": (filled['exit_reason'] == "target").sum() / n,
+            "stop_rate": (filled['exit_reason'] == "stop").sum() / n,
+            "timeout_rate": (filled['exit_reason'] == "timeout").sum() / n,
+            "avg_return_pct": closed['return_pct'].mean(),
+            "median_return_pct": closed['return_pct'].median(),
+            "win_rate": (closed['return_pct'] > 0).mean() if len(closed) else np.nan,
+        })
+
+    rows = {"ALL": stats(trades)}
+    for decision, group in trades.groupby('decision'):
+        rows[decision] = stats(group)
+    return pd.DataFrame(rows).T
+
+
+def run_backtest(strategy, frames, symbols=None, fundamentals=None, sentiment=None,
+                 entry_days=1, max_hold=10):
+    """
+    Backtests ConfluenceStrategy over OHLCV frames (e.g. from the bar store).
+
+    Args:
+        strategy (ConfluenceStrategy): Strategy whose rules are replayed.
+        frames (dict): symbol -> OHLCV DataFrame.
+        fundamentals / sentiment: Point-in-time inputs, see score_panel.
+
+    Returns:
+        tuple: (trades, summary) DataFrames.
+    """
+    timings = {}
+    t0 = time.perf_counter()
+    indicators = compute_panel_indicators(build_panel(frames, symbols))
+    timings['indicators'] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    scores = score_panel(strategy, indicators, fundamentals=fundamentals, sentiment=sentiment)
+    timings['scoring'] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    trades = simulate_trades(indicators, scores, entry_days=entry_days, max_hold=max_hold)
+    timings['simulation'] = time.perf_counter() - t0
+
+    print(f"[BACKTEST] {len(indicators.symbols)} symbols x {len(indicators.dates)} days, "
+          f"{len(trades)} signals ("
+          + ", ".join(f"{k} {v:.2f}s" for k, v in timings.items()) + ")")
+    return trades, summarize(trades)
+
+
+def synthetic_frames(n_symbols, n_days, seed=7):
+    """
+    Random-walk OHLCV frames for benchmarks and self-checks. Price level, volatility
+    and liquidity vary per symbol (penny stocks to blue chips), and volume rises
+    with the size of the day's move.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=n_days)
+    frames = {}
+    for i in range(n_symbols):
+        level = np.exp(rng.uniform(np.log(50), np.log(20_000)))
+        vol = rng.uniform(0.01, 0.04)
+        returns = rng.normal(0.0005, vol, n_days)
+        close = level * np.exp(np.cumsum(returns))
+        spread = np.abs(rng.normal(0, vol * 0.6, n_days)) * close
+        open_ = close * (1 + rng.normal(0, vol * 0.4, n_days))
+        volume = rng.lognormal(rng.uniform(12, 18), 0.8, n_days) * (1 + 20 * np.abs(returns))
+        frames[f"SYN{i:05d}.JK"] = pd.DataFrame({
+            'Open': open_,
+            'High': np.maximum(open_, close) + spread,
+            'Low': np.minimum(open_, close) - spread,
+            'Close': close,
+            'Volume': volume.round(),
+        }, index=dates)
+    return frames
+
+
+if __name__ == "__main__":
+    import argparse
+    from strategy.score_strategy import ConfluenceStrategy
+
+    parser = argparse.ArgumentParser(description="Vectorized ConfluenceStrategy backtest")
+    parser.add_argument("--synthetic", type=int, metavar="N", help="Use N random-walk symbols instead of the bar store")
+    parser.add_argument("--days", type=int, default=300, help="Sessions of synthetic history")
+    parser.add_argument("--max-hold", type=int, default=10)
+    parser.add_argument("--check", action="store_true", help="Compare decisions with the per-symbol path on a sample")
+    args = parser.parse_args()
+
+    strategy = ConfluenceStrategy()
+    if args.synthetic:
+        frames = synthetic_frames(args.synthetic, args.days)
+    else:
+        import config
+        from data.market_data import bar_store
+        frames = {s: bar_store.load(s, config.TIMEFRAME) for s in config.STOCK_UNIVERSE}
+        frames = {s: df for s, df in frames.items() if df is not None}
+        if not frames:
+            raise SystemExit("No stored bars. Run a scan first or use --synthetic N.")
+
+    trades, summary = run_backtest(strategy, frames, max_hold=args.max_hold)
+    with pd.option_context('display.float_format', '{:.3f}'.format, 'display.width', 200, 'display.max_columns', None):
+        print(summary)
+
+    if args.check:
+        # Per-symbol path with the same inputs (no fundamentals, no sentiment)
+        from indicators.indicators import add_indicators
+        strategy.fundamentals.analyze = lambda symbol: (0, [])
+        indicators = compute_panel_indicators(build_panel(frames))
+        scores = score_panel(strategy, indicators)
+        rng = np.random.default_rng(1)
+        mismatches = 0
+        checked = 0
+        for symbol in rng.choice(indicators.symbols, size=min(20, len(indicators.symbols)), replace=False):
+            full = add_indicators(frames[symbol].copy())
+            j = indicators.positions[symbol]
+            for t in range(50, len(full), 7):
+                result, state = strategy.score_pre_sentiment(full.iloc[:t + 1], symbol)
+                if result is None:
+                    result = strategy.finalize(state)
+                row = indicators.dates.get_loc(full.index[t])
+                checked += 1
+                if bool(result['valid']) != bool(scores['valid'][row, j]):
+                    mismatches += 1
+        assert mismatches == 0, f"{mismatches}/{checked} decisions differ from calculate_score"
+        print(f"[BACKTEST] Decisions match the per-symbol path on {checked} (date, symbol) samples")
@@ -1,10 +1,138 @@
-
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import yfinance as yf
 import pandas as pd
+import config
+from scan_pipeline import stage_slot
+from output.metrics import scan_metrics
+
+# On-disk fundamentals so .info (~1s per symbol) is fetched at most once a day,
+# across process restarts and CI sessions.
+STORE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "fundamentals_cache.json")
+
+class FundamentalStore:
+    """
+    Market Cap, ROE and trailing PE per symbol, persisted as JSON with a TTL.
+    """
+    def __init__(self, path=STORE_FILE, ttl_hours=24):
+        self.path = path
+        self.ttl_seconds = ttl_hours * 3600
+        self.lock = threading.Lock()
+        self.entries = self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"[FUNDAMENTALS] Store read error: {e}")
+            return {}
+
+    def save(self):
+        with self.lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self.entries, f)
+            os.replace(tmp_path, self.path)
+
+    def get(self, symbol):
+        return self.entries.get(symbol)
+
+    def is_stale(self, entry):
+        return entry is None or time.time() - entry['fetched_at'] >= self.ttl_seconds
+
+    def put(self, symbol, info, save=True):
+        entry = {
+            "market_cap": info.get('marketCap'),
+            "roe": info.get('returnOnEquity'),
+            "pe": info.get('trailingPE'),
+            "fetched_at": time.time()
+        }
+        with self.lock:
+            self.entries[symbol] = entry
+        if save:
+            try:
+                self.save()
+            except Exception as e:
+                print(f"[FUNDAMENTALS] Store write error: {e}")
+        return entry
 
 class FundamentalAnalyst:
-    def __init__(self):
-        self.cache = {}
+    def __init__(self, store=None, offline=False):
+        self.store = store or FundamentalStore(ttl_hours=config.FUNDAMENTALS_TTL_HOURS)
+        # Replay mode: score from the store as-is, never call yfinance
+        self.offline = offline
+        # Stale entries are refreshed here while scans keep using the old values
+        self.refresh_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fund-refresh")
+        self.refreshing = set()
+        self.refreshing_lock = threading.Lock()
+
+    def fetch(self, symbol, save=True, background=False):
+        """
+        Downloads .info for a symbol into the store. Returns the stored entry.
+        background=True keeps the call out of the running scan's metrics.
+        """
+        with stage_slot("fundamentals"), scan_metrics.provider("yfinance_info", background=background):
+            info = yf.Ticker(symbol).info
+        return self.store.put(symbol, info, save=save)
+
+    def _refresh(self, symbol):
+        try:
+            self.fetch(symbol, background=True)
+        except Exception as e:
+            print(f"[WARN] Fundamental refresh failed for {symbol}: {e}")
+        finally:
+            with self.refreshing_lock:
+                self.refreshing.discard(symbol)
+
+    def _schedule_refresh(self, symbol):
+        with self.refreshing_lock:
+            if symbol in self.refreshing:
+                return
+            self.refreshing.add(symbol)
+        self.refresh_pool.submit(self._refresh, symbol)
+
+    def prefetch(self, symbols, max_workers=None):
+        """
+        Fills the store for every symbol that is missing or stale, with bounded
+        concurrency. Meant to run before market open (or in the background).
+        Uses its own worker limit rather than the scans' "fundamentals" stage slot,
+        so a running scan never queues behind it.
+        """
+        todo = [s for s in symbols if self.store.is_stale(self.store.get(s))]
+        if not todo or self.offline:
+            return 0
+        if max_workers is None:
+            max_workers = config.FUNDAMENTALS_PREFETCH_WORKERS
+            
+        print(f"[FUNDAMENTALS] Prefetching {len(todo)} symbols...")
+        failed = 0
+        
+        def fetch_one(symbol):
+            try:
+                with scan_metrics.provider("yfinance_info", background=True):
+                    info = yf.Ticker(symbol).info
+                self.store.put(symbol, info, save=False)
+                return True
+            except Exception:
+                return False
+                
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fund-prefetch") as pool:
+            for ok in pool.map(fetch_one, todo):
+                failed += 0 if ok else 1
+                
+        try:
+            self.store.save()
+        except Exception as e:
+            print(f"[FUNDAMENTALS] Store write error: {e}")
+        print(f"[FUNDAMENTALS] Prefetch done ({len(todo) - failed} ok, {failed} failed).")
+        return len(todo) - failed
 
     def analyze(self, symbol):
         """
@@ -15,19 +143,22 @@ class FundamentalAnalyst:
         3. ROE (> 5%)
         """
         try:
-            # Check cache to avoid spamming yfinance if we re-scan
-            # In a live loop, we might want to refresh this daily.
-            if symbol in self.cache:
-                return self.cache[symbol]
-
-            t = yf.Ticker(symbol)
-            info = t.info
+            # Stale-while-revalidate: a stale entry is used as-is and refreshed in the background.
+            # Only symbols never seen before block on yfinance.
+            entry = self.store.get(symbol)
+            scan_metrics.cache("fundamentals", hits=int(entry is not None), misses=int(entry is None))
+            if entry is None and self.offline:
+                return 0, ["N/A"]
+            if entry is None:
+                entry = self.fetch(symbol)
+            elif self.store.is_stale(entry) and not self.offline:
+                self._schedule_refresh(symbol)
             
             score = 0
             reasons = []
             
             # 1. Market Cap (> 500 Billion IDR) - Filter 'Gorengan' lightly
-            mcap = info.get('marketCap', 0)
+            mcap = entry.get('market_cap', 0)
             if mcap is None: mcap = 0
             
             if mcap > 10_000_000_000_000: # > 10T (Blue Chip)
@@ -40,7 +171,7 @@ class FundamentalAnalyst:
                 reasons.append("Micro Cap (High Risk)")
                 
             # 2. Profitability (ROE)
-            roe = info.get('returnOnEquity', 0)
+            roe = entry.get('roe', 0)
             if roe is None: roe = 0
             if roe > 0.15: # > 15%
                 score += 4
@@ -50,7 +181,7 @@ class FundamentalAnalyst:
                 reasons.append("Profitable")
                 
             # 3. Valuation (PE)
-            pe = info.get('trailingPE', 0)
+            pe = entry.get('pe', 0)
             if pe is None: pe = 0
             
             if 0 < pe < 15:
@@ -63,9 +194,7 @@ class FundamentalAnalyst:
                 score -= 5 # Penalty remains
                 reasons.append("Overvalued")
 
-            result = (score, reasons)
-            self.cache[symbol] = result
-            return result
+            return score, reasons
         except Exception as e:
             print(f"[WARN] Fundamental Check Failed for {symbol}: {e}")
             return 0, ["N/A"]
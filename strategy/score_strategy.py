@@ -1,23 +1,99 @@
 
+import numpy as np
 import pandas as pd
-from indicators.sentiment import get_market_sentiment
+from indicators.sentiment import get_market_sentiment, get_market_sentiment_batch, QUOTA_SKIP_REASON
+from data.rate_limiter import provider_quota
+from output.metrics import scan_metrics
 from data.bandarmology import Bandarmology
 from strategy.fundamental_analyst import FundamentalAnalyst
 
+SNAPSHOT_COLUMNS = ['Close', 'PrevClose', 'High', 'Low', 'Volume', 'MA20', 'MA50', 'RSI', 'VolMA20', 'Bars']
+
+def no_data_result(symbol):
+    return {"valid": False, "score": 0, "decision": "NO DATA", "symbol": symbol}
+
+def bearish_skip_result(symbol):
+    return {
+        "valid": False,
+        "score": 0,
+        "decision": "BEARISH_SKIP",
+        "reasons": "Trend Bearish (< MA50)",
+        "symbol": symbol
+    }
+
+def weak_tech_result(symbol, score):
+    return {"valid": False, "score": score, "decision": "WEAK_TECH", "symbol": symbol}
+
+def build_snapshot(frames, symbols=None):
+    """
+    Collects the last bar of every indicator frame into one DataFrame
+    (indexed by symbol) for ConfluenceStrategy.screen_batch.
+    """
+    if symbols is None:
+        symbols = list(frames.keys())
+    
+    rows = np.full((len(symbols), len(SNAPSHOT_COLUMNS)), np.nan)
+    for i, symbol in enumerate(symbols):
+        df = frames.get(symbol)
+        if df is None:
+            rows[i, -1] = 0
+            continue
+        rows[i, -1] = len(df)
+        if len(df) < 2 or 'MA20' not in df.columns:
+            continue
+        last = df.iloc[-1]
+        rows[i, :-1] = [
+            last['Close'], df['Close'].iat[-2], last['High'], last['Low'], last['Volume'],
+            last['MA20'], last['MA50'], last['RSI'], last['VolMA20']
+        ]
+    return pd.DataFrame(rows, index=symbols, columns=SNAPSHOT_COLUMNS)
+
 class ConfluenceStrategy:
+    build_snapshot = staticmethod(build_snapshot)
+
     def __init__(self):
         self.bandarmology = Bandarmology()
         self.fundamentals = FundamentalAnalyst()
+        # Replay mode: no news or Gemini requests, sentiment is left out of the score
+        self.offline = False
+
+    def set_offline(self, offline=True):
+        """Scores without any network call (stored fundamentals only, no sentiment)."""
+        self.offline = offline
+        self.fundamentals.offline = offline
 
     def calculate_score(self, df, symbol):
         """
         Calculates a 'Council of Analysts' Score (0-100).
         Strict Logic: Must pass Technicals to even check Fundamentals/AI.
         """
+        result, state = self.score_pre_sentiment(df, symbol)
+        if result is not None:
+            return result
+        
+        # --- 5. Sentiment/News Analyst (Max 20 pts) ---
+        # Only fetch if we are looking good (Score > 45)
+        sentiment = None
+        if self.needs_sentiment(state) and not self.offline:
+            if provider_quota.is_exhausted("gemini"):
+                sentiment = (0, QUOTA_SKIP_REASON)
+            else:
+                scan_metrics.count("sentiment_checked")
+                sentiment = get_market_sentiment(symbol)
+            
+        return self.finalize(state, sentiment)
+
+    def score_pre_sentiment(self, df, symbol):
+        """
+        Runs the Flow, Technical and Fundamental analysts.
+        
+        Returns:
+            tuple: (result, state) - result is the early-exit dict (NO DATA,
+            BEARISH_SKIP, WEAK_TECH) and state is None, or result is None and
+            state carries the partial score into needs_sentiment / finalize.
+        """
         if df is None or len(df) < 50:
-            return {
-                "valid": False, "score": 0, "decision": "NO DATA", "symbol": symbol
-            }
+            return no_data_result(symbol), None
 
         curr = df.iloc[-1]
         score = 0
@@ -91,13 +167,7 @@ class ConfluenceStrategy:
         else:
             # STRICT FILTER: If Price < MA50, Ignore entirely.
             if not (rsi < 30): 
-                 return {
-                     "valid": False,
-                     "score": 0,
-                     "decision": "BEARISH_SKIP",
-                     "reasons": "Trend Bearish (< MA50)",
-                     "symbol": symbol
-                 }
+                 return bearish_skip_result(symbol), None
 
         # RSI - Adjusted for Momentum
         if 50 <= rsi <= 75:
@@ -120,17 +190,53 @@ class ConfluenceStrategy:
         # Cutoff: If Tech < 20 AND Flow is Weak, Skip.
         # But if Flow is Strong (passed_flow), we allow it even if Tech is mediocre.
         if tech_score < 15 and not passed_flow:
-             return {"valid": False, "score": score, "decision": "WEAK_TECH", "symbol": symbol}
+             return weak_tech_result(symbol, score), None
         
         # --- 4. Fundamental Analyst (Max 15 pts) ---
         fund_score, fund_reasons = self.fundamentals.analyze(symbol)
         analyst_notes["Fundamental"] = fund_reasons
         score += fund_score
 
+        return None, {
+            "symbol": symbol,
+            "curr": curr,
+            "score": score,
+            "flow_score": flow_score,
+            "has_strong_flow": has_strong_flow,
+            "analyst_notes": analyst_notes,
+            "close": close,
+            "ma20": ma20,
+            "ma50": ma50,
+            "rsi": rsi,
+            "vol": vol,
+            "vol_ma": vol_ma
+        }
+
+    def needs_sentiment(self, state):
+        """Sentiment is only fetched for setups that already look good (Score >= 45)."""
+        return state['score'] >= 45
+
+    def finalize(self, state, sentiment=None):
+        """
+        Applies the Sentiment verdict (ai_score, ai_reason), if any, and builds
+        the final result dict from a score_pre_sentiment state.
+        """
+        symbol = state['symbol']
+        curr = state['curr']
+        score = state['score']
+        flow_score = state['flow_score']
+        has_strong_flow = state['has_strong_flow']
+        analyst_notes = state['analyst_notes']
+        close = state['close']
+        ma20 = state['ma20']
+        ma50 = state['ma50']
+        rsi = state['rsi']
+        vol = state['vol']
+        vol_ma = state['vol_ma']
+        
         # --- 5. Sentiment/News Analyst (Max 20 pts) ---
-        # Only fetch if we are looking good (Score > 45)
-        if score >= 45:
-            ai_score, ai_reason = get_market_sentiment(symbol)
+        if sentiment is not None:
+            ai_score, ai_reason = sentiment
             
             sentiment_label = "Neutral News"
             if ai_score > 20:
@@ -188,3 +294,141 @@ class ConfluenceStrategy:
             "reward_pct": 5.0,
             "news_summary": "\n".join(analyst_notes["Sentiment"])
         }
+
+    def screen_batch(self, snapshot):
+        """
+        Applies the cheap Flow and Technical rules of calculate_score to a whole
+        snapshot (see build_snapshot) at once with NumPy masks.
+        Works on arrays of any shape, so the same rules can run on (dates x symbols).
+        
+        Returns:
+            dict of np.ndarray: flow_score, tech_score, passed_flow, has_strong_flow,
+            no_data, bearish_skip, weak_tech, survivors.
+        """
+        close = np.asarray(snapshot['Close'], dtype=float)
+        prev_close = np.asarray(snapshot['PrevClose'], dtype=float)
+        high = np.asarray(snapshot['High'], dtype=float)
+        low = np.asarray(snapshot['Low'], dtype=float)
+        vol = np.asarray(snapshot['Volume'], dtype=float)
+        ma20 = np.asarray(snapshot['MA20'], dtype=float)
+        ma50 = np.asarray(snapshot['MA50'], dtype=float)
+        rsi = np.asarray(snapshot['RSI'], dtype=float)
+        vol_ma = np.asarray(snapshot['VolMA20'], dtype=float)
+        bars = np.asarray(snapshot['Bars'], dtype=float)
+        
+        with np.errstate(invalid='ignore'):
+            # --- Flow Analyst ---
+            smart_money = (close > prev_close) & (vol > (vol_ma * 1.5))
+            flow_data = self.bandarmology.calculate_flow_proxies_batch(close, high, low, vol)
+            passed_flow = flow_data['passed_filters']
+            accum_val = flow_data['accumulation_value']
+            bonus = np.where(accum_val >= 50_000_000_000, 20, np.where(accum_val >= 5_000_000_000, 10, 0))
+            flow_score = np.where(smart_money, 10, 0) + np.where(passed_flow, 15 + bonus, 0)
+            has_strong_flow = smart_money | passed_flow
+            
+            # --- Technical Analyst ---
+            bullish = ma20 > ma50
+            above_ma50 = ~bullish & (close > ma50)
+            bearish_skip = ~bullish & ~above_ma50 & ~(rsi < 30)
+            
+            trend_pts = np.where(bullish, 10, np.where(above_ma50, 5, 0))
+            rsi_pts = np.where((rsi >= 50) & (rsi <= 75), 10,
+                      np.where((rsi >= 40) & (rsi < 50), 5,
+                      np.where(rsi > 75, 5, 0)))
+            vol_pts = np.where(vol > vol_ma, 10, 0)
+            tech_score = trend_pts + rsi_pts + vol_pts
+        
+        no_data = bars < 50
+        bearish_skip = bearish_skip & ~no_data
+        weak_tech = ~no_data & ~bearish_skip & (tech_score < 15) & ~passed_flow
+        survivors = ~no_data & ~bearish_skip & ~weak_tech
+        
+        return {
+            "flow_score": flow_score,
+            "tech_score": tech_score,
+            "passed_flow": passed_flow,
+            "has_strong_flow": has_strong_flow,
+            "no_data": no_data,
+            "bearish_skip": bearish_skip,
+            "weak_tech": weak_tech,
+            "survivors": survivors
+        }
+
+    def screen_results(self, frames, symbols=None, snapshot=None):
+        """
+        Runs screen_batch and returns the early-exit result for every symbol that
+        fails it (NO DATA / BEARISH_SKIP / WEAK_TECH), or None for survivors that
+        still need the per-symbol Fundamental and Sentiment checks.
+        Pass `snapshot` if the caller already built it for the same symbols.
+        """
+        if symbols is None:
+            symbols = list(frames.keys())
+            
+        if snapshot is None:
+            snapshot = build_snapshot(frames, symbols)
+        screen = self.screen_batch(snapshot)
+        
+        results = []
+        for i, symbol in enumerate(symbols):
+            if screen['no_data'][i]:
+                results.append(no_data_result(symbol))
+            elif screen['bearish_skip'][i]:
+                results.append(bearish_skip_result(symbol))
+            elif screen['weak_tech'][i]:
+                score = int(screen['flow_score'][i] + screen['tech_score'][i])
+                results.append(weak_tech_result(symbol, score))
+            else:
+                results.append(None)
+        return results
+
+    def calculate_scores(self, frames, symbols=None):
+        """
+        Batch version of calculate_score. Screens every symbol with screen_batch and
+        only runs the per-symbol path (Fundamentals, Sentiment) for survivors.
+        Results are identical to calling calculate_score symbol by symbol.
+        
+        Args:
+            frames (dict): symbol -> indicator DataFrame.
+            symbols (list): Output order. Defaults to the dict order of `frames`.
+            
+        Returns:
+            list of dict: One result per symbol.
+        """
+        if symbols is None:
+            symbols = list(frames.keys())
+            
+        results = self.screen_results(frames, symbols)
+        states = {}
+        for i, symbol in enumerate(symbols):
+            if results[i] is None:
+                results[i], state = self.score_pre_sentiment(frames[symbol], symbol)
+                if state is not None:
+                    states[symbol] = state
+                
+        finalized = self.finalize_batch(states)
+        for i, symbol in enumerate(symbols):
+            if symbol in finalized:
+                results[i] = finalized[symbol]
+        return results
+
+    def finalize_batch(self, states):
+        """
+        Finalizes many score_pre_sentiment states, fetching sentiment for every
+        candidate in one batched lookup (best setups get the first requests).
+        
+        Returns:
+            dict: symbol -> result
+        """
+        candidates = {s: st['score'] for s, st in states.items() if self.needs_sentiment(st)}
+        if self.offline:
+            sentiments = {}
+        elif candidates and provider_quota.is_exhausted("gemini"):
+            # Daily Gemini budget spent: don't gather news or wait on 429s
+            sentiments = {s: (0, QUOTA_SKIP_REASON) for s in candidates}
+        elif candidates:
+            scan_metrics.count("sentiment_checked", len(candidates))
+            by_score = sorted(candidates, key=candidates.get, reverse=True)
+            sentiments = get_market_sentiment_batch(by_score, priorities=candidates)
+        else:
+            sentiments = {}
+        return {s: self.finalize(st, sentiments.get(s)) for s, st in states.items()}